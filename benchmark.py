@@ -0,0 +1,311 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import capacidad
+import costeo
+import cubo
+import datos
+import graficos
+import ingesta
+import motor
+import pronostico
+
+# ===== GENERADOR DE DATOS SINTÉTICOS (mismo esquema que el libro ICAIEX) =====
+
+CATEGORIAS = {
+    'Adulto': ['Básico', 'Premium'],
+    'Joven': ['Juventud'],
+    'Niño': ['Infantil'],
+    'Bebé': ['Bebé'],
+}
+UNIDADES = ['metro', 'unidad', 'kg', 'cono']
+
+
+def _ids(prefijo, n):
+    ancho = max(3, len(str(n)))
+    return [f"{prefijo}{i:0{ancho}d}" for i in range(1, n + 1)]
+
+
+def generar_hojas(productos=20, insumos=15, procesos=5, años=4, año_inicial=2021, semilla=0):
+    """Libro sintético {hoja: DataFrame} con las hojas y columnas de ESQUEMAS.
+
+    Los datos son coherentes entre sí: el costo sale de la lista de
+    materiales y la ruta, el precio es un margen sobre el costo y la
+    capacidad de cada proceso cubre la demanda media con holgura.
+    """
+    rng = np.random.default_rng(semilla)
+    ids_producto = _ids('P', productos)
+    ids_insumo = _ids('I', insumos)
+    ids_proceso = _ids('PR', procesos)
+
+    categoria = rng.choice(list(CATEGORIAS), productos)
+    linea = [rng.choice(CATEGORIAS[c]) for c in categoria]
+
+    hojas = {}
+    hojas['INSUMOS'] = pd.DataFrame({
+        'ID_Insumo': ids_insumo,
+        'Nombre_Insumo': [f"Insumo {i}" for i in ids_insumo],
+        'Unidad_Medida': rng.choice(UNIDADES, insumos),
+        'Costo_Unitario(S/)': rng.uniform(0.1, 30, insumos).round(2),
+    })
+    hojas['PROCESOS'] = pd.DataFrame({
+        'ID_Proceso': ids_proceso,
+        'Nombre_Proceso': [f"Proceso {i}" for i in ids_proceso],
+        'Costo_Minuto(S/)': rng.uniform(0.3, 1.2, procesos).round(2),
+        'Operarios_Asignados': rng.integers(2, 10, procesos),
+    })
+
+    # Lista de materiales: entre 2 y 5 insumos distintos por producto
+    usados = min(insumos, 5)
+    elegidos = np.argsort(rng.random((productos, insumos)), axis=1)[:, :usados]
+    cuantos = rng.integers(min(2, usados), usados + 1, productos)
+    mascara = np.arange(usados) < cuantos[:, None]
+    filas, columnas = np.nonzero(mascara)
+    hojas['CONSUMO_INSUMOS'] = pd.DataFrame({
+        'ID_Producto': np.array(ids_producto)[filas],
+        'ID_Insumo': np.array(ids_insumo)[elegidos[filas, columnas]],
+        'Cantidad_Requerida': rng.uniform(0.05, 2, len(filas)).round(2),
+    })
+
+    # Ruta: todos los productos pasan por todos los procesos (0 minutos = no lo usa)
+    tiempos = rng.integers(0, 30, (productos, procesos))
+    tiempos[tiempos.sum(axis=1) == 0, 0] = 10
+    hojas['TIEMPO_PROCESOS'] = pd.DataFrame({
+        'ID_Producto': np.repeat(ids_producto, procesos),
+        'ID_Proceso': np.tile(ids_proceso, productos),
+        'Tiempo_Minutos': tiempos.ravel(),
+    })
+    hojas['PRODUCTOS'] = pd.DataFrame({
+        'ID_Producto': ids_producto,
+        'Nombre_Producto': [f"Producto {i}" for i in ids_producto],
+        'Categoria': categoria,
+        'Linea': linea,
+        'TiempoProd_Total(min)': tiempos.sum(axis=1),
+    })
+
+    rollup = costeo.construir_rollup({**hojas})
+    costo_insumos, costo_procesos = rollup['costo_insumos'], rollup['costo_procesos']
+    markup = rng.uniform(1.6, 2.2, productos)
+    demanda_base = rng.lognormal(6.5, 0.6, productos)
+    meses = np.arange(12)
+    estacional = 1 + 0.25 * np.sin(2 * np.pi * (meses - 2) / 12)
+
+    for k in range(años):
+        año = año_inicial + k
+        deriva = (1 + 0.04 * k) * rng.normal(1, 0.01, (productos, 12))
+        media = demanda_base[:, None] * estacional * (1 + 0.05 * k) * rng.normal(1, 0.08, (productos, 12))
+        insumos_mes = costo_insumos[:, None] * deriva
+        procesos_mes = costo_procesos[:, None] * deriva
+        total = insumos_mes + procesos_mes
+        precio = (total * markup[:, None]).round(1)
+
+        base = {'ID_Producto': np.repeat(ids_producto, 12), 'Mes': np.tile(datos.MESES, productos)}
+        hojas[f'DEMANDA_{año}'] = pd.DataFrame({
+            **base,
+            'Demanda_Minima': np.round(media * 0.6).astype(int).ravel(),
+            'Demanda_Maxima': np.round(media * 1.5).astype(int).ravel(),
+            'Precio_Venta(S/)': precio.ravel(),
+        })
+        hojas[f'COSTOS_{año}'] = pd.DataFrame({
+            **base,
+            'Costo_Insumos(S/)': insumos_mes.round(2).ravel(),
+            'Costo_Procesos(S/)': procesos_mes.round(2).ravel(),
+            'Costo_Total(S/)': total.round(2).ravel(),
+        })
+
+        # Capacidad: minutos para la demanda media con 10-40% de holgura
+        requeridos = tiempos.T @ media
+        minutos = np.round(requeridos * rng.uniform(1.1, 1.4, (procesos, 1)), -2)
+        hojas[f'CAPACIDAD_{año}'] = pd.DataFrame({
+            'ID_Proceso': np.repeat(ids_proceso, 12),
+            'Nombre_Proceso': np.repeat(hojas['PROCESOS']['Nombre_Proceso'], 12),
+            'Mes': np.tile(datos.MESES, procesos),
+            'Minutos_Disponibles': minutos.astype(int).ravel(),
+            'Operarios_Disponibles': np.repeat(hojas['PROCESOS']['Operarios_Asignados'], 12),
+        })
+
+    orden = (['PRODUCTOS', 'INSUMOS', 'PROCESOS', 'CONSUMO_INSUMOS', 'TIEMPO_PROCESOS']
+             + [f"{prefijo}_{año_inicial + k}" for prefijo in datos.HECHOS for k in range(años)])
+    return {hoja: hojas[hoja] for hoja in orden}
+
+
+def escribir_libro(hojas, ruta):
+    """Guarda las hojas como un .xlsx con el formato del libro original."""
+    with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+        for hoja, df in hojas.items():
+            df.to_excel(writer, sheet_name=hoja, index=False)
+
+
+# ===== MEDICIÓN =====
+
+def medir(funcion, repeticiones=1):
+    """(segundos del mejor intento, pico de memoria en MB del primero, resultado)."""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    tiempos = [time.perf_counter() - inicio]
+    pico = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    for _ in range(repeticiones - 1):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), pico, resultado
+
+
+def escribir_extractos(hojas, carpeta):
+    """Extracto mensual (CSV) de cada hecho: el enero siguiente al último año del libro.
+
+    Es la carga mensual que el dashboard recibe por `ingesta.py`.
+    """
+    ultimo = max(datos.años_en_hojas(hojas))
+    rutas = {}
+    for hecho in datos.HECHOS:
+        hoja = hojas[f"{hecho}_{ultimo}"]
+        rutas[hecho] = os.path.join(carpeta, f"{hecho.lower()}_{ultimo + 1}_01.csv")
+        hoja[hoja['Mes'] == 'Enero'].assign(Año=ultimo + 1).to_csv(rutas[hecho], index=False)
+    return rutas
+
+
+def pasos_secciones(ruta, carpeta, ensayos=10_000):
+    """Ruta de cálculo de cada sección del dashboard, en el orden en que se ejecutan.
+
+    Cada paso recibe el estado acumulado (modelo, índices, ...) y devuelve
+    lo que agrega. Llaman a las mismas funciones que el dashboard (las de
+    `motor`, `capacidad`, `costeo`, ...) con sus parámetros por defecto,
+    sobre el libro `ruta` ya convertido y con las cachés en `carpeta` para
+    no tocar las del proyecto.
+    """
+    cache = os.path.join(carpeta, 'cache')
+
+    def carga(estado):
+        # Igual que `motor.cargar_modelo`: catálogo validado + periodos ingeridos, tablas al primer uso
+        modelo = datos.ModeloPerezoso(ingesta.HojasConIngesta(datos.Catalogo(ruta, cache),
+                                                              os.path.join(carpeta, 'ingesta')))
+        for nombre in modelo:
+            modelo[nombre]
+        # El año base de los selectores del dashboard (último año completo)
+        return {'modelo': modelo, 'año': datos.años_disponibles(modelo)[-1]}
+
+    def indices(estado):
+        return {'indices': datos.construir_indices(estado['modelo'])}
+
+    def resumen(estado):
+        productos = estado['modelo']['PRODUCTOS']
+        productos['Categoria'].value_counts()
+        productos['Linea'].value_counts()
+        graficos.caja(productos['TiempoProd_Total(min)'], "Tiempos")
+        return {}
+
+    def costos(estado):
+        cubo_costos = cubo.construir_cubo(estado['modelo'])
+        for año in datos.años_disponibles(estado['modelo']):
+            motor.resumen_costos(cubo_costos, año)
+        return {'cubo': cubo_costos}
+
+    def costo_estandar(estado):
+        rollup = costeo.construir_rollup(estado['modelo'])
+        costeo.costos_estandar(rollup)
+        return {'rollup': rollup}
+
+    def demanda(estado):
+        series = datos.construir_series(estado['modelo'])
+        agregados = datos.agregaciones_series(series)
+        return {'vistas': datos.vistas_por_producto(series, agregados)}
+
+    def pronosticos(estado):
+        # Igual que `motor.modelo_proyectado`, con los parámetros ajustados guardados en `carpeta`
+        tabla = pronostico.pronostico_modelo(estado['modelo'], cache_dir=cache)
+        return {'proyeccion': pronostico.modelo_proyectado(estado['modelo'], tabla)}
+
+    def procesos(estado):
+        for uso in capacidad.utilizacion_por_año(estado['proyeccion']).values():
+            capacidad.cuellos_de_botella(uso)
+        return {}
+
+    def plan(estado):
+        motor.plan_año(estado['proyeccion'], estado['año'], motor.PARAMETROS['enteros'],
+                       motor.PARAMETROS['cumplir_minimo'], motor.PARAMETROS['minutos_por_operario'])
+        return {}
+
+    def barrido(estado):
+        motor.barrido_año(estado['modelo'], estado['año'], motor.RANGOS_BARRIDO, motor.PARAMETROS['pasos_barrido'])
+        motor.tornado_año(estado['modelo'], estado['año'], motor.PARAMETROS['valores_base_barrido'],
+                          motor.RANGOS_BARRIDO)
+        return {}
+
+    def monte_carlo(estado):
+        motor.riesgo_año(estado['modelo'], estado['año'], ensayos, motor.PARAMETROS['semilla'])
+        return {}
+
+    return [
+        ('carga', carga), ('indices', indices), ('resumen', resumen), ('costos', costos),
+        ('costo_estandar', costo_estandar), ('demanda', demanda), ('pronostico', pronosticos),
+        ('procesos', procesos), ('plan_optimo', plan), ('barrido', barrido), ('monte_carlo', monte_carlo),
+    ]
+
+
+def ejecutar(productos=20, insumos=15, procesos=5, años=4, repeticiones=1, ensayos=10_000):
+    """Tiempos y memoria de cada paso para un tamaño de catálogo; una fila por paso.
+
+    El libro sintético se escribe en disco y recorre el mismo camino que
+    el real: conversión Excel -> Parquet, ingesta de un mes y carga del
+    modelo con validación de esquemas.
+    """
+    hojas = generar_hojas(productos, insumos, procesos, años)
+    filas = []
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, 'sintetico.xlsx')
+        escribir_libro(hojas, ruta)
+        extractos = escribir_extractos(hojas, carpeta)
+
+        # La conversión y la ingesta dejan su resultado en disco: se miden una sola vez
+        segundos, pico, _ = medir(lambda: datos.construir_cache(ruta, os.path.join(carpeta, 'cache')))
+        filas.append({'paso': 'excel_a_parquet', 'segundos': segundos, 'pico_mb': pico})
+        segundos, pico, _ = medir(lambda: [ingesta.ingerir(extracto, hecho, directorio=os.path.join(carpeta, 'ingesta'))
+                                           for hecho, extracto in extractos.items()])
+        filas.append({'paso': 'ingesta', 'segundos': segundos, 'pico_mb': pico})
+
+        estado = {}
+        for nombre, paso in pasos_secciones(ruta, carpeta, ensayos):
+            segundos, pico, nuevo = medir(lambda: paso(estado), repeticiones)
+            estado.update(nuevo)
+            filas.append({'paso': nombre, 'segundos': segundos, 'pico_mb': pico})
+
+    resultado = pd.DataFrame(filas)
+    resultado.insert(0, 'productos', productos)
+    resultado.insert(1, 'insumos', insumos)
+    resultado.insert(2, 'procesos', procesos)
+    resultado.insert(3, 'años', años)
+    return resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark de la ruta de cálculo del dashboard con datos sintéticos.")
+    parser.add_argument('--productos', type=int, nargs='+', default=[20],
+                        help="Uno o más tamaños de catálogo (se mide cada uno)")
+    parser.add_argument('--insumos', type=int, default=15)
+    parser.add_argument('--procesos', type=int, default=5)
+    parser.add_argument('--años', type=int, default=4)
+    parser.add_argument('--repeticiones', type=int, default=3, help="Se reporta el mejor tiempo")
+    parser.add_argument('--ensayos', type=int, default=10_000, help="Ensayos de Monte Carlo")
+    parser.add_argument('--salida', default=None, help="CSV donde agregar los resultados (para comparar corridas)")
+    args = parser.parse_args()
+
+    resultados = pd.concat([
+        ejecutar(n, args.insumos, args.procesos, args.años, args.repeticiones, args.ensayos)
+        for n in args.productos
+    ], ignore_index=True)
+    print(resultados.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if args.salida:
+        resultados.insert(0, 'fecha', pd.Timestamp.now().isoformat(timespec='seconds'))
+        resultados.to_csv(args.salida, mode='a', index=False, header=not os.path.exists(args.salida))
@@ -0,0 +1,125 @@
+import functools
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+import telemetria
+
+# Cantidad máxima de resultados guardados (tablas derivadas y figuras)
+MAX_ENTRADAS = 256
+# Memoria máxima estimada de todos los resultados guardados
+MAX_BYTES = 256 * 2**20
+
+
+def tamano_bytes(valor):
+    """Estimación de la memoria de un resultado: arreglos, tablas, figuras y contenedores."""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, BaseFigure):
+        return tamano_bytes([traza.to_plotly_json() for traza in valor.data])
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_bytes(k) + tamano_bytes(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamano_bytes(v) for v in valor)
+    return sys.getsizeof(valor)
+
+
+class CacheLRU:
+    """Caché LRU acotada y segura entre hilos.
+
+    Vive a nivel de módulo, por lo que la comparten todas las sesiones de
+    Streamlit del mismo proceso y sobrevive a los reruns del script. Se
+    acota por número de entradas y por memoria estimada (`tamano_bytes`):
+    se desalojan las menos usadas hasta cumplir ambos límites, y un
+    resultado más grande que `max_bytes` no se guarda.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS, max_bytes=MAX_BYTES):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()
+        self._tamanos = {}
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = {}
+        self.fallos = {}
+
+    def obtener(self, seccion, clave, calcular, registro=None):
+        """Devuelve el valor guardado para `clave` o lo calcula y lo guarda.
+
+        Si se pasa `registro` (un span de telemetría) se anota si fue acierto o fallo.
+        """
+        with self._lock:
+            acierto = clave in self._entradas
+            if acierto:
+                self._entradas.move_to_end(clave)
+                self.aciertos[seccion] = self.aciertos.get(seccion, 0) + 1
+                valor = self._entradas[clave]
+            else:
+                self.fallos[seccion] = self.fallos.get(seccion, 0) + 1
+        telemetria.contar(f"cache.{seccion}.{'aciertos' if acierto else 'fallos'}")
+        if registro is not None:
+            registro['cache'] = 'acierto' if acierto else 'fallo'
+        if acierto:
+            return valor
+
+        # Se calcula (y se mide) fuera del lock para no bloquear a otras sesiones
+        valor = calcular()
+        tamano = tamano_bytes(valor)
+        if tamano > self.max_bytes:
+            return valor
+
+        with self._lock:
+            if clave in self._entradas:
+                self.bytes -= self._tamanos[clave]
+            self._entradas[clave] = valor
+            self._tamanos[clave] = tamano
+            self.bytes += tamano
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas or self.bytes > self.max_bytes:
+                desalojada, _ = self._entradas.popitem(last=False)
+                self.bytes -= self._tamanos.pop(desalojada)
+        return valor
+
+    def estadisticas(self):
+        """Aciertos y fallos por sección, entradas y memoria estimada."""
+        with self._lock:
+            secciones = sorted(set(self.aciertos) | set(self.fallos))
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'secciones': {
+                    seccion: {'aciertos': self.aciertos.get(seccion, 0), 'fallos': self.fallos.get(seccion, 0)}
+                    for seccion in secciones
+                },
+            }
+
+
+cache = CacheLRU()
+
+
+def memoizar(seccion):
+    """Memoiza una función en la caché compartida.
+
+    La clave es (sección, función, argumentos); los argumentos deben ser
+    hashables e incluir la versión de los datos (la firma del Excel) para
+    que un archivo nuevo no reutilice resultados viejos.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args):
+            clave = (seccion, funcion.__qualname__) + args
+            with telemetria.span(f"{seccion}.{funcion.__name__}") as registro:
+                return cache.obtener(seccion, clave, lambda: funcion(*args), registro)
+        return envoltura
+    return decorador
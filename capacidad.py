@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+import costeo
+import datos
+
+# Escenarios de demanda que se pueden cargar sobre la capacidad
+MEDIDAS_DEMANDA = {
+    'Media': None,
+    'Mínima': 'Demanda_Minima',
+    'Máxima': 'Demanda_Maxima',
+}
+
+
+def utilizacion(modelo, medida='Media', demanda=None):
+    """Carga requerida vs capacidad disponible por proceso, año y mes.
+
+    La carga es  TIEMPOS^T (proceso x producto) @ DEMANDA (producto x año·mes)
+    con la matriz de tiempos dispersa, para todos los años a la vez. Se
+    puede pasar `demanda` (tabla con Año, Mes, ID_Producto y Demanda) para
+    usar, por ejemplo, un pronóstico en lugar de la demanda histórica.
+    """
+    productos = modelo['PRODUCTOS']['ID_Producto'].tolist()
+    procesos = modelo['PROCESOS']['ID_Proceso'].tolist()
+
+    if demanda is None:
+        demanda = modelo['DEMANDA']
+        columna = MEDIDAS_DEMANDA[medida]
+        if columna is None:
+            valores = (demanda['Demanda_Minima'] + demanda['Demanda_Maxima']) / 2
+        else:
+            valores = demanda[columna]
+        demanda = demanda[['Año', 'Mes', 'ID_Producto']].assign(Demanda=valores)
+
+    matriz = demanda.pivot_table(index='ID_Producto', columns=['Año', 'Mes'], values='Demanda',
+                                 aggfunc='sum', observed=True)
+    matriz = matriz.reindex(index=productos).fillna(0)
+    periodos = matriz.columns
+
+    tiempos = costeo.matriz_dispersa(modelo['TIEMPO_PROCESOS'], productos, procesos,
+                                     'ID_Producto', 'ID_Proceso', 'Tiempo_Minutos')
+    carga = np.asarray(tiempos.T @ matriz.to_numpy(dtype=float))      # (proceso, periodo)
+
+    uso = pd.DataFrame({
+        'ID_Proceso': np.repeat(procesos, len(periodos)),
+        'Año': np.tile(periodos.get_level_values('Año'), len(procesos)),
+        'Mes': pd.Categorical(np.tile(periodos.get_level_values('Mes').astype(str), len(procesos)),
+                              dtype=datos.TIPO_MES),
+        'Minutos_Requeridos': carga.ravel(),
+    })
+    uso = uso.merge(modelo['CAPACIDAD'][['Año', 'Mes', 'ID_Proceso', 'Nombre_Proceso',
+                                         'Minutos_Disponibles', 'Operarios_Disponibles']],
+                    on=['Año', 'Mes', 'ID_Proceso'], how='left')
+
+    disponibles = uso['Minutos_Disponibles'].to_numpy(dtype=float)
+    operarios = uso['Operarios_Disponibles'].to_numpy(dtype=float)
+    hay_capacidad = np.nan_to_num(disponibles) > 0
+    uso['Utilizacion'] = np.divide(uso['Minutos_Requeridos'], disponibles,
+                                   out=np.full(len(uso), np.nan), where=hay_capacidad)
+    # Minutos que aporta cada operario = Minutos_Disponibles / Operarios_Disponibles
+    uso['Operarios_Requeridos'] = np.ceil(np.divide(uso['Minutos_Requeridos'] * operarios, disponibles,
+                                                    out=np.full(len(uso), np.nan), where=hay_capacidad))
+    return uso.sort_values(['Año', 'ID_Proceso', 'Mes'], ignore_index=True)
+
+
+def utilizacion_por_año(modelo, medida='Media'):
+    """{año: utilización de ese año}, calculado en una sola pasada."""
+    uso = utilizacion(modelo, medida)
+    return {int(año): grupo.reset_index(drop=True) for año, grupo in uso.groupby('Año')}
+
+
+def cuellos_de_botella(uso):
+    """Ranking de procesos por utilización (el primero es el cuello de botella)."""
+    ranking = uso.assign(Sobre_Capacidad=uso['Utilizacion'] > 1).groupby(
+        ['ID_Proceso', 'Nombre_Proceso'], observed=True
+    ).agg(
+        Utilizacion_Maxima=('Utilizacion', 'max'),
+        Utilizacion_Media=('Utilizacion', 'mean'),
+        Meses_Sobre_Capacidad=('Sobre_Capacidad', 'sum'),
+        Operarios_Requeridos_Max=('Operarios_Requeridos', 'max'),
+        Operarios_Disponibles=('Operarios_Disponibles', 'max'),
+    ).reset_index()
+    return ranking.sort_values('Utilizacion_Maxima', ascending=False, ignore_index=True)
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+def matriz_dispersa(df, filas, columnas, clave_fila, clave_columna, valor):
+    """Matriz dispersa CSC (filas x columnas) a partir de una tabla de relación."""
+    i = pd.Index(filas).get_indexer(df[clave_fila])
+    j = pd.Index(columnas).get_indexer(df[clave_columna])
+    validos = (i >= 0) & (j >= 0)
+    return sparse.csc_matrix(
+        (df[valor].to_numpy(dtype=float)[validos], (i[validos], j[validos])),
+        shape=(len(filas), len(columnas)),
+    )
+
+
+def construir_rollup(modelo):
+    """Costo estándar de todos los productos a partir de la lista de materiales y la ruta.
+
+    costo_insumos  = CONSUMO (producto x insumo)  @ Costo_Unitario(S/)
+    costo_procesos = TIEMPOS (producto x proceso) @ Costo_Minuto(S/)
+    """
+    productos = modelo['PRODUCTOS']['ID_Producto'].tolist()
+    insumos = modelo['INSUMOS']['ID_Insumo'].tolist()
+    procesos = modelo['PROCESOS']['ID_Proceso'].tolist()
+
+    consumo = matriz_dispersa(modelo['CONSUMO_INSUMOS'], productos, insumos,
+                              'ID_Producto', 'ID_Insumo', 'Cantidad_Requerida')
+    tiempos = matriz_dispersa(modelo['TIEMPO_PROCESOS'], productos, procesos,
+                              'ID_Producto', 'ID_Proceso', 'Tiempo_Minutos')
+    precios = modelo['INSUMOS']['Costo_Unitario(S/)'].to_numpy(dtype=float)
+    tarifas = modelo['PROCESOS']['Costo_Minuto(S/)'].to_numpy(dtype=float)
+
+    return {
+        'productos': productos,
+        'insumos': insumos,
+        'procesos': procesos,
+        'posicion': {pid: k for k, pid in enumerate(productos)},
+        'consumo': consumo,
+        'tiempos': tiempos,
+        'consumo_filas': consumo.tocsr(),
+        'tiempos_filas': tiempos.tocsr(),
+        'precios_insumos': precios,
+        'tarifas_procesos': tarifas,
+        'costo_insumos': consumo @ precios,
+        'costo_procesos': tiempos @ tarifas,
+        'nombres_insumos': modelo['INSUMOS']['Nombre_Insumo'].tolist(),
+        'nombres_procesos': modelo['PROCESOS']['Nombre_Proceso'].tolist(),
+    }
+
+
+def actualizar_insumo(rollup, id_insumo, nuevo_costo):
+    """Nuevo rollup con el precio de un insumo cambiado.
+
+    Sólo se recalculan los productos que usan ese insumo (una columna de
+    la matriz de consumo); el rollup original no se modifica.
+    """
+    j = rollup['insumos'].index(id_insumo)
+    columna = rollup['consumo'][:, j]
+    precios = rollup['precios_insumos'].copy()
+    delta = nuevo_costo - precios[j]
+    precios[j] = nuevo_costo
+
+    costo_insumos = rollup['costo_insumos'].copy()
+    costo_insumos[columna.indices] += columna.data * delta
+    return {**rollup, 'precios_insumos': precios, 'costo_insumos': costo_insumos}
+
+
+def actualizar_proceso(rollup, id_proceso, nueva_tarifa):
+    """Nuevo rollup con el costo por minuto de un proceso cambiado (actualización incremental)."""
+    j = rollup['procesos'].index(id_proceso)
+    columna = rollup['tiempos'][:, j]
+    tarifas = rollup['tarifas_procesos'].copy()
+    delta = nueva_tarifa - tarifas[j]
+    tarifas[j] = nueva_tarifa
+
+    costo_procesos = rollup['costo_procesos'].copy()
+    costo_procesos[columna.indices] += columna.data * delta
+    return {**rollup, 'tarifas_procesos': tarifas, 'costo_procesos': costo_procesos}
+
+
+def costos_estandar(rollup):
+    """Tabla con el costo estándar de insumos, procesos y total de cada producto."""
+    tabla = pd.DataFrame({
+        'ID_Producto': rollup['productos'],
+        'Costo_Insumos(S/)': rollup['costo_insumos'],
+        'Costo_Procesos(S/)': rollup['costo_procesos'],
+    })
+    tabla['Costo_Total(S/)'] = tabla['Costo_Insumos(S/)'] + tabla['Costo_Procesos(S/)']
+    tabla['Participacion_Insumos'] = np.divide(
+        tabla['Costo_Insumos(S/)'], tabla['Costo_Total(S/)'],
+        out=np.zeros(len(tabla)), where=tabla['Costo_Total(S/)'] > 0
+    )
+    return tabla
+
+
+def participacion_insumos(rollup, producto_id):
+    """Fracción del costo estándar de un producto que corresponde a insumos."""
+    k = rollup['posicion'][producto_id]
+    total = rollup['costo_insumos'][k] + rollup['costo_procesos'][k]
+    return rollup['costo_insumos'][k] / total if total > 0 else 0.0
+
+
+def desglose_producto(rollup, producto_id):
+    """Componentes del costo estándar de un producto (sólo lee su fila de cada matriz)."""
+    k = rollup['posicion'][producto_id]
+    consumo = rollup['consumo_filas'][k]
+    tiempos = rollup['tiempos_filas'][k]
+
+    insumos = pd.DataFrame({
+        'Tipo': 'Insumo',
+        'Componente': [rollup['nombres_insumos'][j] for j in consumo.indices],
+        'Cantidad': consumo.data,
+        'Costo_Unitario(S/)': rollup['precios_insumos'][consumo.indices],
+    })
+    procesos = pd.DataFrame({
+        'Tipo': 'Proceso',
+        'Componente': [rollup['nombres_procesos'][j] for j in tiempos.indices],
+        'Cantidad': tiempos.data,
+        'Costo_Unitario(S/)': rollup['tarifas_procesos'][tiempos.indices],
+    })
+    desglose = pd.concat([insumos, procesos], ignore_index=True)
+    desglose['Costo(S/)'] = desglose['Cantidad'] * desglose['Costo_Unitario(S/)']
+    return desglose
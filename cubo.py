@@ -0,0 +1,76 @@
+from itertools import combinations
+
+DIMENSIONES = ['Año', 'Mes', 'Categoria', 'Linea', 'ID_Producto']
+MEDIDAS = ['Costo_Insumos(S/)', 'Costo_Procesos(S/)', 'Costo_Total(S/)',
+           'Precio_Venta(S/)', 'Margen(S/)', 'Margen_Porcentaje']
+# Filas con valor de cada medida: un costo sin demanda ese mes no tiene precio ni margen
+CONTEOS = [f"Filas_{medida}" for medida in MEDIDAS]
+
+
+def construir_cubo(modelo):
+    """Cubo de costos y márgenes preagregado sobre Año x Mes x Categoria x Linea x Producto.
+
+    Se materializan las sumas de las medidas, el número de filas y el de
+    valores no nulos de cada medida para cada combinación de dimensiones
+    (la retícula completa), cada una indexada por sus dimensiones. Las
+    medias se obtienen como suma / valores de la medida (igual que
+    `mean`, que ignora los NaN), así que cualquier roll-up o drill-down se
+    responde sin volver a las filas de COSTOS.
+    """
+    costos = modelo['COSTOS']
+    conteos = {conteo: costos[medida].notna() for conteo, medida in zip(CONTEOS, MEDIDAS)}
+    base = costos[DIMENSIONES + MEDIDAS].assign(Filas=1, **conteos).groupby(DIMENSIONES, observed=True).sum()
+
+    vistas = {tuple(DIMENSIONES): base}
+    for k in range(len(DIMENSIONES) - 1, -1, -1):
+        for dimensiones in combinations(DIMENSIONES, k):
+            # Cada vista se agrega desde la base ya reducida, no desde las filas
+            if dimensiones:
+                vistas[dimensiones] = base.groupby(list(dimensiones), observed=True).sum()
+            else:
+                vistas[dimensiones] = base.sum().to_frame().T
+
+    return {
+        'vistas': vistas,
+        'nombres': modelo['PRODUCTOS'].set_index('ID_Producto')['Nombre_Producto'],
+        'años': sorted(int(a) for a in base.index.get_level_values('Año').unique()),
+    }
+
+
+def _vista(cubo, dimensiones):
+    return cubo['vistas'][tuple(d for d in DIMENSIONES if d in dimensiones)]
+
+
+def consultar(cubo, por=(), filtros=None):
+    """Medias de las medidas agrupadas `por` las dimensiones indicadas.
+
+    `filtros` es {dimensión: valor o lista de valores}. Se usa la vista más
+    pequeña que contiene `por` y las dimensiones filtradas; si hay que
+    quitar una dimensión filtrada se suma sobre la vista ya agregada.
+    """
+    filtros = filtros or {}
+    por = [d for d in DIMENSIONES if d in por]
+    vista = _vista(cubo, set(por) | set(filtros))
+
+    for dimension, valor in filtros.items():
+        valores = valor if isinstance(valor, (list, tuple, set)) else [valor]
+        vista = vista[vista.index.get_level_values(dimension).isin(valores)]
+
+    if set(por) != set(vista.index.names) - {None}:
+        vista = vista.groupby(por, observed=True).sum() if por else vista.sum().to_frame().T
+
+    # Sin valores de una medida en el grupo la media queda en NaN (no en 0)
+    valores = vista[CONTEOS].set_axis(MEDIDAS, axis=1)
+    resultado = vista[MEDIDAS].div(valores.where(valores > 0))
+    resultado['Filas'] = vista['Filas'].astype(int)
+    resultado = resultado.reset_index(drop=not por)
+    if 'ID_Producto' in por:
+        resultado.insert(por.index('ID_Producto') + 1, 'Nombre_Producto',
+                         resultado['ID_Producto'].map(cubo['nombres']))
+    return resultado
+
+
+def top_n(cubo, medida, n=10, filtros=None):
+    """Los `n` productos con mayor valor medio de `medida` dentro de los filtros."""
+    ranking = consultar(cubo, ['ID_Producto', 'Categoria', 'Linea'], filtros)
+    return ranking.nlargest(n, medida).reset_index(drop=True)
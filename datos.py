@@ -0,0 +1,449 @@
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import telemetria
+
+# Archivo fuente y carpeta donde se guarda la copia columnar (una hoja = un Parquet)
+ARCHIVO_EXCEL = "ICAIEX_Datos_Completos_20Productos.xlsx"
+DIRECTORIO_CACHE = ".cache_datos"
+MANIFIESTO = "manifiesto.json"
+
+
+def firma_archivo(file_path=ARCHIVO_EXCEL):
+    """Firma barata del Excel (mtime + tamaño) para invalidar cachés."""
+    stat = os.stat(file_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def hash_archivo(file_path):
+    """SHA-256 del contenido del Excel."""
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _directorio_hojas(file_path, cache_dir):
+    nombre = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, nombre)
+
+
+def leer_manifiesto(directorio):
+    """Manifiesto JSON del directorio, o None si todavía no existe."""
+    ruta = os.path.join(directorio, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def escribir_manifiesto(directorio, manifiesto):
+    """Escribe el manifiesto de forma atómica (archivo temporal + `os.replace`)."""
+    ruta = os.path.join(directorio, MANIFIESTO)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, ruta)
+
+
+def cache_vigente(file_path=ARCHIVO_EXCEL, cache_dir=DIRECTORIO_CACHE):
+    """Indica si la copia columnar corresponde al Excel actual.
+
+    Primero compara mtime y tamaño; si cambiaron, compara el hash del
+    contenido (un `touch` o una copia no obligan a reconstruir).
+    """
+    directorio = _directorio_hojas(file_path, cache_dir)
+    manifiesto = leer_manifiesto(directorio)
+    if manifiesto is None:
+        return False
+    if not all(os.path.exists(os.path.join(directorio, f"{hoja}.parquet"))
+               for hoja in manifiesto["hojas"]):
+        return False
+
+    stat = os.stat(file_path)
+    if manifiesto["mtime_ns"] == stat.st_mtime_ns and manifiesto["tamano"] == stat.st_size:
+        return True
+
+    if manifiesto["sha256"] != hash_archivo(file_path):
+        return False
+
+    # Mismo contenido con otra fecha: se actualiza el manifiesto y se reutiliza
+    manifiesto["mtime_ns"] = stat.st_mtime_ns
+    manifiesto["tamano"] = stat.st_size
+    escribir_manifiesto(directorio, manifiesto)
+    return True
+
+
+@telemetria.medido('carga.excel_a_parquet')
+def construir_cache(file_path=ARCHIVO_EXCEL, cache_dir=DIRECTORIO_CACHE):
+    """Lee el Excel una sola vez y guarda cada hoja como Parquet."""
+    directorio = _directorio_hojas(file_path, cache_dir)
+    os.makedirs(directorio, exist_ok=True)
+
+    stat = os.stat(file_path)
+    hojas = pd.read_excel(file_path, sheet_name=None)
+
+    for hoja, df in hojas.items():
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        destino = os.path.join(directorio, f"{hoja}.parquet")
+        pq.write_table(tabla, destino + ".tmp")
+        os.replace(destino + ".tmp", destino)
+
+    escribir_manifiesto(directorio, {
+        "archivo": os.path.basename(file_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "tamano": stat.st_size,
+        "sha256": hash_archivo(file_path),
+        "hojas": list(hojas),
+    })
+    return hojas
+
+
+def leer_hoja(hoja, file_path=ARCHIVO_EXCEL, cache_dir=DIRECTORIO_CACHE):
+    """Lee una hoja desde su Parquet usando memory-map."""
+    directorio = _directorio_hojas(file_path, cache_dir)
+    ruta = os.path.join(directorio, f"{hoja}.parquet")
+    return pq.read_table(ruta, memory_map=True).to_pandas()
+
+
+# ===== CATÁLOGO DE HOJAS (carga perezosa con esquema) =====
+
+# Esquema de cada hoja: columnas con su tipo y claves que deben ser únicas y no nulas.
+# Las hojas anuales (DEMANDA_2021, ...) usan el esquema de su prefijo.
+ESQUEMAS = {
+    'PRODUCTOS': {
+        'columnas': {'ID_Producto': 'str', 'Nombre_Producto': 'str', 'Categoria': 'str', 'Linea': 'str',
+                     'TiempoProd_Total(min)': 'float64'},
+        'claves': ['ID_Producto'],
+    },
+    'INSUMOS': {
+        'columnas': {'ID_Insumo': 'str', 'Nombre_Insumo': 'str', 'Unidad_Medida': 'str',
+                     'Costo_Unitario(S/)': 'float64'},
+        'claves': ['ID_Insumo'],
+    },
+    'PROCESOS': {
+        'columnas': {'ID_Proceso': 'str', 'Nombre_Proceso': 'str', 'Costo_Minuto(S/)': 'float64',
+                     'Operarios_Asignados': 'int64'},
+        'claves': ['ID_Proceso'],
+    },
+    'CONSUMO_INSUMOS': {
+        'columnas': {'ID_Producto': 'str', 'ID_Insumo': 'str', 'Cantidad_Requerida': 'float64'},
+        'claves': ['ID_Producto', 'ID_Insumo'],
+    },
+    'TIEMPO_PROCESOS': {
+        'columnas': {'ID_Producto': 'str', 'ID_Proceso': 'str', 'Tiempo_Minutos': 'float64'},
+        'claves': ['ID_Producto', 'ID_Proceso'],
+    },
+    'DEMANDA': {
+        'columnas': {'ID_Producto': 'str', 'Mes': 'str', 'Demanda_Minima': 'float64',
+                     'Demanda_Maxima': 'float64', 'Precio_Venta(S/)': 'float64'},
+        'claves': ['ID_Producto', 'Mes'],
+    },
+    'COSTOS': {
+        'columnas': {'ID_Producto': 'str', 'Mes': 'str', 'Costo_Insumos(S/)': 'float64',
+                     'Costo_Procesos(S/)': 'float64', 'Costo_Total(S/)': 'float64'},
+        'claves': ['ID_Producto', 'Mes'],
+    },
+    'CAPACIDAD': {
+        'columnas': {'ID_Proceso': 'str', 'Nombre_Proceso': 'str', 'Mes': 'str',
+                     'Minutos_Disponibles': 'float64', 'Operarios_Disponibles': 'float64'},
+        'claves': ['ID_Proceso', 'Mes'],
+    },
+}
+
+
+def año_de_hoja(nombre, prefijo):
+    """Año de una hoja `PREFIJO_AAAA`, o None si el nombre no corresponde."""
+    base, _, sufijo = nombre.rpartition('_')
+    return int(sufijo) if base == prefijo and sufijo.isdigit() else None
+
+
+def esquema_de_hoja(nombre):
+    """Esquema declarado para la hoja (o para su prefijo si es anual)."""
+    if nombre in ESQUEMAS:
+        return ESQUEMAS[nombre]
+    base = nombre.rpartition('_')[0]
+    if base in ESQUEMAS and año_de_hoja(nombre, base) is not None:
+        return ESQUEMAS[base]
+    return None
+
+
+def validar_hoja(nombre, df):
+    """Verifica columnas y claves de la hoja y convierte sus tipos según el esquema.
+
+    Los tipos numéricos se comparan sin distinguir entero de decimal: una
+    columna entera se acepta donde se declara float64 y se deja como está.
+    """
+    esquema = esquema_de_hoja(nombre)
+    if esquema is None:
+        return df
+
+    faltantes = [c for c in esquema['columnas'] if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Hoja {nombre}: faltan las columnas {faltantes}")
+
+    df = df.copy()
+    for columna, tipo in esquema['columnas'].items():
+        if tipo == 'str':
+            if not pd.api.types.is_string_dtype(df[columna]):
+                df[columna] = df[columna].astype(str)
+        elif not pd.api.types.is_numeric_dtype(df[columna]):
+            try:
+                df[columna] = pd.to_numeric(df[columna]).astype(tipo)
+            except (TypeError, ValueError) as error:
+                raise ValueError(f"Hoja {nombre}: la columna {columna} no es numérica") from error
+        elif tipo == 'int64' and not pd.api.types.is_integer_dtype(df[columna]):
+            df[columna] = df[columna].astype(tipo)
+
+    claves = esquema['claves']
+    if df[claves].isna().any().any():
+        raise ValueError(f"Hoja {nombre}: hay claves vacías en {claves}")
+    if df.duplicated(claves).any():
+        raise ValueError(f"Hoja {nombre}: hay claves repetidas en {claves}")
+    return df
+
+
+class Catalogo(Mapping):
+    """Hojas del libro como un diccionario perezoso {hoja: DataFrame}.
+
+    Los nombres salen del manifiesto de la caché columnar; cada hoja se lee
+    de su Parquet y se valida contra ESQUEMAS sólo la primera vez que se
+    pide. Así, abrir una sección carga únicamente las hojas que usa.
+    """
+
+    def __init__(self, file_path=ARCHIVO_EXCEL, cache_dir=DIRECTORIO_CACHE):
+        self.file_path = file_path
+        self.cache_dir = cache_dir
+        if not cache_vigente(file_path, cache_dir):
+            construir_cache(file_path, cache_dir)
+        self._nombres = leer_manifiesto(_directorio_hojas(file_path, cache_dir))["hojas"]
+        self._hojas = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, hoja):
+        if hoja not in self._nombres:
+            raise KeyError(hoja)
+        with self._lock:
+            if hoja not in self._hojas:
+                with telemetria.span(f"carga.hoja.{hoja}"):
+                    self._hojas[hoja] = validar_hoja(hoja, leer_hoja(hoja, self.file_path, self.cache_dir))
+            return self._hojas[hoja]
+
+    def __iter__(self):
+        return iter(self._nombres)
+
+    def __len__(self):
+        return len(self._nombres)
+
+
+# ===== MODELO DE DATOS (tablas de hechos en formato largo) =====
+
+MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+TIPO_MES = pd.CategoricalDtype(MESES, ordered=True)
+
+HECHOS = ['DEMANDA', 'COSTOS', 'CAPACIDAD']
+ATRIBUTOS_PRODUCTO = ['ID_Producto', 'Nombre_Producto', 'Categoria', 'Linea']
+
+
+def periodos(años, meses):
+    """PeriodIndex mensual a partir de las columnas Año y Mes (categórico)."""
+    return pd.PeriodIndex.from_fields(year=np.asarray(años),
+                                      month=np.asarray(meses.cat.codes) + 1, freq='M')
+
+
+def años_en_hojas(hojas, prefijo='DEMANDA'):
+    """Años de las hojas `PREFIJO_AAAA`, leídos sólo de los nombres (no carga las hojas)."""
+    return sorted(año for año in (año_de_hoja(nombre, prefijo) for nombre in hojas) if año is not None)
+
+
+def hojas_por_año(hojas, prefijo):
+    """{año: DataFrame} para las hojas `PREFIJO_AAAA` presentes."""
+    return {año: hojas[f"{prefijo}_{año}"] for año in años_en_hojas(hojas, prefijo)}
+
+
+def _apilar(hojas, prefijo):
+    """Concatena las hojas anuales de un prefijo agregando la columna Año."""
+    por_año = hojas_por_año(hojas, prefijo)
+    if not por_año:
+        return pd.DataFrame()
+    hecho = pd.concat([df.assign(Año=año) for año, df in por_año.items()], ignore_index=True)
+    hecho['Mes'] = hecho['Mes'].astype(TIPO_MES)
+    hecho['Periodo'] = periodos(hecho['Año'], hecho['Mes'])
+    columnas = ['Año', 'Mes', 'Periodo'] + [c for c in hecho.columns if c not in ('Año', 'Mes', 'Periodo')]
+    return hecho[columnas]
+
+
+class ModeloPerezoso(Mapping):
+    """Modelo de datos cuyas tablas se arman la primera vez que se piden.
+
+    Contiene los maestros (PRODUCTOS, INSUMOS, PROCESOS, CONSUMO_INSUMOS,
+    TIEMPO_PROCESOS) y las tablas de hechos DEMANDA, COSTOS y CAPACIDAD
+    (una fila por Año/Mes/clave). Las hojas anuales no se exponen: agregar
+    un año sólo agrega filas. Sobre un `Catalogo`, pedir PRODUCTOS no lee
+    ninguna hoja de hechos.
+    """
+
+    def __init__(self, hojas):
+        self.hojas = hojas
+        anuales = {f"{prefijo}_{año}" for prefijo in HECHOS for año in años_en_hojas(hojas, prefijo)}
+        self._nombres = [nombre for nombre in hojas if nombre not in anuales] + HECHOS
+        self._tablas = {}
+        # Reentrante: armar COSTOS pide DEMANDA y PRODUCTOS
+        self._lock = threading.RLock()
+
+    def __getitem__(self, nombre):
+        if nombre not in self._nombres:
+            raise KeyError(nombre)
+        with self._lock:
+            if nombre not in self._tablas:
+                with telemetria.span(f"carga.tabla.{nombre}"):
+                    self._tablas[nombre] = self._construir(nombre)
+            return self._tablas[nombre]
+
+    def __iter__(self):
+        return iter(self._nombres)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def _construir(self, nombre):
+        if nombre == 'PRODUCTOS':
+            productos = self.hojas['PRODUCTOS'].copy()
+            productos['Categoria'] = productos['Categoria'].astype('category')
+            productos['Linea'] = productos['Linea'].astype('category')
+            return productos
+
+        if nombre == 'DEMANDA':
+            demanda = _apilar(self.hojas, 'DEMANDA').merge(self['PRODUCTOS'][ATRIBUTOS_PRODUCTO],
+                                                           on='ID_Producto', how='left')
+            return demanda.sort_values(['ID_Producto', 'Año', 'Mes'], ignore_index=True)
+
+        if nombre == 'COSTOS':
+            costos = _apilar(self.hojas, 'COSTOS').merge(
+                self['DEMANDA'][['Año', 'Mes', 'ID_Producto', 'Precio_Venta(S/)']],
+                on=['Año', 'Mes', 'ID_Producto'], how='left'
+            ).merge(self['PRODUCTOS'][ATRIBUTOS_PRODUCTO], on='ID_Producto', how='left')
+            costos['Margen(S/)'] = costos['Precio_Venta(S/)'] - costos['Costo_Total(S/)']
+            costos['Margen_Porcentaje'] = (costos['Margen(S/)'] / costos['Precio_Venta(S/)']) * 100
+            return costos.sort_values(['ID_Producto', 'Año', 'Mes'], ignore_index=True)
+
+        if nombre == 'CAPACIDAD':
+            capacidad = _apilar(self.hojas, 'CAPACIDAD')
+            capacidad['Nombre_Proceso'] = capacidad['Nombre_Proceso'].astype('category')
+            return capacidad.sort_values(['ID_Proceso', 'Año', 'Mes'], ignore_index=True)
+
+        return self.hojas[nombre]
+
+
+def construir_modelo(hojas):
+    """Arma de inmediato todas las tablas del modelo (ver `ModeloPerezoso`) en un diccionario."""
+    modelo = ModeloPerezoso(hojas)
+    return {nombre: modelo[nombre] for nombre in modelo}
+
+
+def años_disponibles(modelo, hechos=HECHOS, completos=True):
+    """Años presentes en todas las tablas de hechos indicadas (por defecto, las tres).
+
+    Con `completos` sólo cuentan los años con los 12 meses en cada tabla:
+    tras una ingesta mensual el año en curso tiene pocos meses (o sólo
+    demanda) y no sirve como año base para costear, planificar ni simular.
+    """
+    def años(hecho):
+        meses = modelo[hecho].groupby('Año')['Mes'].nunique()
+        return {int(año) for año, n in meses.items() if n == len(MESES) or not completos}
+    return sorted(set.intersection(*(años(hecho) for hecho in hechos)))
+
+
+# ===== ÍNDICES POR PRODUCTO =====
+
+def por_producto(df, ids):
+    """{ID_Producto: filas del producto}; los productos sin filas reciben un frame vacío."""
+    grupos = {pid: g for pid, g in df.groupby('ID_Producto', sort=False, observed=True)}
+    vacio = df.iloc[0:0]
+    return {pid: grupos.get(pid, vacio) for pid in ids}
+
+
+def construir_indices(modelo):
+    """Índices para que seleccionar un producto sea una búsqueda en diccionario.
+
+    - `id_por_nombre`: Nombre_Producto -> ID_Producto
+    - `producto`: ID_Producto -> fila de PRODUCTOS
+    - `insumos`, `procesos`: lista de materiales y ruta ya unidas a sus maestros
+    - `costos`, `demanda`: filas del producto en las tablas de hechos
+    """
+    productos = modelo['PRODUCTOS']
+    ids = productos['ID_Producto'].tolist()
+
+    return {
+        'id_por_nombre': dict(zip(productos['Nombre_Producto'], productos['ID_Producto'])),
+        'producto': {fila['ID_Producto']: fila for _, fila in productos.iterrows()},
+        'insumos': por_producto(modelo['CONSUMO_INSUMOS'].merge(modelo['INSUMOS'], on='ID_Insumo'), ids),
+        'procesos': por_producto(modelo['TIEMPO_PROCESOS'].merge(modelo['PROCESOS'], on='ID_Proceso'), ids),
+        'costos': por_producto(modelo['COSTOS'], ids),
+        'demanda': por_producto(modelo['DEMANDA'], ids),
+    }
+
+
+# ===== SERIES DE TIEMPO (índice por periodo mensual) =====
+
+MEDIDAS_SERIE = ['Demanda_Minima', 'Demanda_Maxima', 'Precio_Venta(S/)']
+
+
+def construir_series(modelo):
+    """Series mensuales de todos los productos con PeriodIndex completo.
+
+    Devuelve {medida: DataFrame (periodo x producto)}. Los meses faltantes
+    quedan como NaN en lugar de desplazar la serie, y el rango se extiende
+    a cualquier año presente en los datos.
+    """
+    demanda = modelo['DEMANDA']
+    rango = pd.period_range(demanda['Periodo'].min(), demanda['Periodo'].max(), freq='M', name='Periodo')
+    productos = modelo['PRODUCTOS']['ID_Producto']
+
+    series = {}
+    for medida in MEDIDAS_SERIE:
+        tabla = demanda.pivot_table(index='Periodo', columns='ID_Producto', values=medida,
+                                    aggfunc='sum', observed=True)
+        series[medida] = tabla.reindex(index=rango, columns=productos)
+    return series
+
+
+def agregaciones_series(series):
+    """Medias móviles, crecimiento interanual y totales trimestrales para todos los productos.
+
+    Todas las operaciones son por columnas sobre las matrices periodo x producto.
+    """
+    demanda_media = (series['Demanda_Minima'] + series['Demanda_Maxima']) / 2
+    return {
+        'Demanda_Media': demanda_media,
+        'Media_Movil_3': demanda_media.rolling(3, min_periods=3).mean(),
+        'Media_Movil_12': demanda_media.rolling(12, min_periods=12).mean(),
+        'Crecimiento_Interanual': demanda_media.pct_change(12, fill_method=None) * 100,
+        'Demanda_Trimestral': demanda_media.groupby(demanda_media.index.asfreq('Q')).sum(min_count=1),
+    }
+
+
+def vistas_por_producto(series, agregados):
+    """{ID_Producto: DataFrame mensual listo para graficar}, armado una sola vez."""
+    columnas = {**{m: series[m] for m in ['Demanda_Minima', 'Demanda_Maxima']},
+                **{m: agregados[m] for m in ['Demanda_Media', 'Media_Movil_3', 'Media_Movil_12',
+                                             'Crecimiento_Interanual']}}
+    largo = pd.concat(columnas, axis=1)   # columnas (medida, producto)
+    largo = largo.swaplevel(axis=1).sort_index(axis=1)
+
+    vistas = {}
+    for producto in series['Demanda_Minima'].columns:
+        vista = largo[producto].copy()
+        vista['Fecha'] = vista.index.to_timestamp()
+        vistas[producto] = vista
+    return vistas
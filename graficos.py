@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Límites de lo que se envía al navegador por gráfico
+MAX_PUNTOS = 500           # puntos por serie de tiempo (LTTB)
+MAX_CATEGORIAS = 30        # barras por gráfico; el resto se agrupa en "Otros"
+MAX_BYTES = 500_000        # tamaño máximo del JSON de una figura
+UMBRAL_WEBGL = 1_000       # desde cuántos puntos una línea usa Scattergl
+MIN_PUNTOS = 50            # límite inferior al reducir una figura para que quepa en MAX_BYTES
+
+
+def _eje_numerico(x):
+    """Eje x como float: fechas en nanosegundos, categorías por su posición."""
+    x = pd.Series(x)
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return x.astype('int64').to_numpy(dtype=float)
+    if isinstance(x.dtype, pd.PeriodDtype):
+        return x.dt.to_timestamp().astype('int64').to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=float)
+    return np.arange(len(x), dtype=float)
+
+
+def lttb(x, y, n):
+    """Índices de los `n` puntos que conserva Largest-Triangle-Three-Buckets.
+
+    Se mantienen el primer y el último punto; de cada uno de los n - 2
+    tramos intermedios se elige el punto que forma el triángulo de mayor
+    área con el punto elegido antes y el promedio del tramo siguiente.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    largo = len(y)
+    if n >= largo or n < 3:
+        return np.arange(largo)
+
+    bordes = np.linspace(1, largo - 1, n - 1).astype(int)
+    indices = np.empty(n, dtype=int)
+    indices[0], indices[-1] = 0, largo - 1
+    a = 0
+    for k in range(n - 2):
+        inicio, fin = bordes[k], max(bordes[k + 1], bordes[k] + 1)
+        if k + 2 < n - 1:
+            siguiente = slice(bordes[k + 1], max(bordes[k + 2], bordes[k + 1] + 1))
+            cx, cy = x[siguiente].mean(), y[siguiente].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        area = np.abs((x[a] - cx) * (y[inicio:fin] - y[a]) - (x[a] - x[inicio:fin]) * (cy - y[a]))
+        a = inicio + int(area.argmax())
+        indices[k + 1] = a
+    return indices
+
+
+def reducir_serie(x, y, max_puntos=MAX_PUNTOS):
+    """(x, y) con a lo más `max_puntos` puntos; los valores faltantes se descartan antes."""
+    x = pd.Series(x).reset_index(drop=True)
+    y = pd.Series(y, dtype=float).reset_index(drop=True)
+    validos = y.notna().to_numpy()
+    x, y = x[validos].reset_index(drop=True), y[validos].reset_index(drop=True)
+    if len(y) <= max_puntos:
+        return x, y
+    indices = lttb(_eje_numerico(x), y.to_numpy(), max_puntos)
+    return x.iloc[indices].reset_index(drop=True), y.iloc[indices].reset_index(drop=True)
+
+
+def linea(x, y, max_puntos=MAX_PUNTOS, **kwargs):
+    """Traza de línea reducida con LTTB; usa WebGL (Scattergl) si la serie es larga.
+
+    WebGL sólo conviene con muchos puntos: cada gráfico Scattergl ocupa un
+    contexto del navegador y éstos son limitados.
+    """
+    largo = len(x)
+    x, y = reducir_serie(x, y, max_puntos)
+    traza = go.Scattergl if largo > UMBRAL_WEBGL else go.Scatter
+    return traza(x=x, y=y, **kwargs)
+
+
+def caja(valores, titulo, nombre=''):
+    """Diagrama de caja con cuartiles precalculados: se envían 6 números, no los datos."""
+    valores = pd.Series(valores, dtype=float).dropna().to_numpy()
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    rango = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * rango) & (valores <= q3 + 1.5 * rango)]
+    fig = go.Figure(go.Box(
+        q1=[q1], median=[mediana], q3=[q3], mean=[valores.mean()],
+        lowerfence=[dentro.min()], upperfence=[dentro.max()],
+        name=nombre, boxpoints=False,
+    ))
+    fig.update_layout(title=titulo)
+    return fig
+
+
+def barras_top(df, x, y, title=None, max_categorias=MAX_CATEGORIAS, **kwargs):
+    """`px.bar` con a lo más `max_categorias` barras.
+
+    Se muestran las categorías con mayor valor (suma de las columnas de
+    `y`); las demás se reemplazan por una barra "Otros" con su promedio.
+    """
+    columnas = [y] if isinstance(y, str) else list(y)
+    if len(df) > max_categorias:
+        orden = df[columnas].sum(axis=1).sort_values(ascending=False).index
+        top = df.loc[orden[:max_categorias - 1]]
+        resto = df.loc[orden[max_categorias - 1:]]
+        otros = pd.DataFrame({x: [f"Otros ({len(resto)}, promedio)"],
+                              **{c: [resto[c].mean()] for c in columnas}})
+        df = pd.concat([top[[x] + columnas], otros], ignore_index=True)
+    return px.bar(df, x=x, y=y, title=title, **kwargs)
+
+
+def bytes_payload(fig):
+    """Tamaño en bytes del JSON que se envía al navegador."""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def limitar_payload(fig, max_bytes=MAX_BYTES):
+    """Reduce las trazas de línea hasta que la figura quepa en `max_bytes`.
+
+    Cada pasada reduce a la mitad el número de puntos (LTTB) de las trazas
+    más largas. El tamaño final queda en `fig._bytes_payload`; una figura
+    ya medida (por ejemplo, guardada en la caché de cálculos) no se vuelve
+    a serializar.
+    """
+    if getattr(fig, '_bytes_payload', None) is not None:
+        return fig
+
+    tamano = bytes_payload(fig)
+    lineas = [t for t in fig.data if t.type in ('scatter', 'scattergl') and t.x is not None and t.y is not None]
+    puntos = max((len(t.x) for t in lineas), default=0)
+    while tamano > max_bytes and puntos > MIN_PUNTOS:
+        puntos = max(puntos // 2, MIN_PUNTOS)
+        for traza in lineas:
+            if len(traza.x) > puntos:
+                traza.x, traza.y = reducir_serie(traza.x, traza.y, puntos)
+        tamano = bytes_payload(fig)
+
+    fig._bytes_payload = tamano
+    return fig
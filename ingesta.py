@@ -0,0 +1,236 @@
+import argparse
+import hashlib
+import os
+from collections.abc import Mapping
+
+import openpyxl
+import pandas as pd
+
+import datos
+
+# Extractos mensuales agregados: un Parquet por hecho, periodo (AAAA-MM) y archivo de origen
+DIRECTORIO_INGESTA = os.path.join(datos.DIRECTORIO_CACHE, 'ingesta')
+FILAS_POR_BLOQUE = 50_000
+
+# Cómo se agregan las filas de un extracto a una fila por (Año, Mes, clave):
+# las cantidades se suman y los precios/costos unitarios se promedian.
+AGREGACIONES = {
+    'DEMANDA': {
+        'claves': ['ID_Producto'],
+        'sumas': ['Demanda_Minima', 'Demanda_Maxima'],
+        'medias': ['Precio_Venta(S/)'],
+    },
+    'COSTOS': {
+        'claves': ['ID_Producto'],
+        'sumas': [],
+        'medias': ['Costo_Insumos(S/)', 'Costo_Procesos(S/)', 'Costo_Total(S/)'],
+    },
+    'CAPACIDAD': {
+        'claves': ['ID_Proceso', 'Nombre_Proceso'],
+        'sumas': ['Minutos_Disponibles', 'Operarios_Disponibles'],
+        'medias': [],
+    },
+}
+
+
+def leer_por_bloques(ruta, hoja=None, filas=FILAS_POR_BLOQUE):
+    """Genera DataFrames de a lo más `filas` filas sin cargar el archivo completo.
+
+    Los CSV se leen con `chunksize`; los xlsx con openpyxl en modo de sólo
+    lectura, que recorre la hoja fila por fila. La primera fila es el
+    encabezado.
+    """
+    if ruta.lower().endswith('.csv'):
+        yield from pd.read_csv(ruta, chunksize=filas)
+        return
+
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas_hoja = (libro[hoja] if hoja else libro.active).iter_rows(values_only=True)
+        encabezado = next(filas_hoja, None)
+        if encabezado is None:
+            return
+        bloque = []
+        for fila in filas_hoja:
+            bloque.append(fila)
+            if len(bloque) == filas:
+                yield pd.DataFrame(bloque, columns=encabezado)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=encabezado)
+    finally:
+        libro.close()
+
+
+def agregar_bloque(bloque, hecho):
+    """Sumas y número de filas por (Año, Mes, clave) de un bloque del extracto.
+
+    `Mes` puede venir como nombre o como número 1-12.
+    """
+    reglas = AGREGACIONES[hecho]
+    medidas = reglas['sumas'] + reglas['medias']
+    requeridas = ['Año', 'Mes'] + reglas['claves'] + medidas
+    faltantes = [c for c in requeridas if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Extracto de {hecho}: faltan las columnas {faltantes}")
+
+    bloque = bloque[requeridas].copy()
+    if pd.api.types.is_numeric_dtype(bloque['Mes']):
+        bloque['Mes'] = [datos.MESES[int(m) - 1] for m in bloque['Mes']]
+    if not bloque['Mes'].isin(datos.MESES).all():
+        raise ValueError(f"Extracto de {hecho}: hay meses no reconocidos")
+    bloque['Año'] = bloque['Año'].astype(int)
+    bloque[medidas] = bloque[medidas].apply(pd.to_numeric)
+    return bloque.assign(Filas=1).groupby(['Año', 'Mes'] + reglas['claves'], sort=False).sum().reset_index()
+
+
+def _combinar(agregados, hecho):
+    """Une agregados parciales sumando sumas y conteos (la agregación es asociativa)."""
+    claves = ['Año', 'Mes'] + AGREGACIONES[hecho]['claves']
+    return pd.concat(agregados, ignore_index=True).groupby(claves, sort=False).sum().reset_index()
+
+
+def _periodo(año, mes):
+    return f"{año}-{datos.MESES.index(mes) + 1:02d}"
+
+
+def _ruta_aporte(directorio, hecho, periodo, fuente):
+    """Parquet con lo que aportó un archivo de origen a un periodo."""
+    id_fuente = hashlib.sha256(fuente.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(directorio, hecho, periodo, f"{id_fuente}.parquet")
+
+
+def _manifiesto(directorio):
+    return datos.leer_manifiesto(directorio) or {'version': 0, 'fuentes': {}}
+
+
+def ingerir(ruta, hecho, hoja=None, directorio=DIRECTORIO_INGESTA, filas=FILAS_POR_BLOQUE):
+    """Agrega un extracto a los periodos ingeridos del hecho.
+
+    El archivo se recorre por bloques y sólo se mantienen los agregados
+    por (Año, Mes, clave), así que la memoria depende del número de claves
+    y no del de filas. El aporte de cada archivo a cada periodo se guarda
+    por separado: al volver a ingerir un archivo que cambió (creció o se
+    corrigió) se reemplaza su aporte anterior en lugar de sumarlo otra vez,
+    y los periodos que ya no trae se retiran. El historial de otros
+    archivos no se reprocesa; archivos distintos con el mismo periodo se
+    suman (por ejemplo, un extracto partido en varios). Un archivo sin
+    cambios (misma firma) se omite.
+    """
+    manifiesto = _manifiesto(directorio)
+    fuente = f"{hecho}:{os.path.abspath(ruta)}"
+    firma = datos.firma_archivo(ruta)
+    anterior = manifiesto['fuentes'].get(fuente)
+    if anterior is not None and anterior['firma'] == firma:
+        return {'archivo': ruta, 'omitido': True, 'reemplazado': False, 'filas': 0, 'periodos': []}
+
+    acumulado = None
+    total_filas = 0
+    for bloque in leer_por_bloques(ruta, hoja, filas):
+        total_filas += len(bloque)
+        parcial = agregar_bloque(bloque, hecho)
+        acumulado = parcial if acumulado is None else _combinar([acumulado, parcial], hecho)
+
+    periodos = []
+    if acumulado is not None:
+        for (año, mes), nuevo in acumulado.groupby(['Año', 'Mes'], sort=False):
+            periodo = _periodo(año, mes)
+            destino = _ruta_aporte(directorio, hecho, periodo, fuente)
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            nuevo.to_parquet(destino + '.tmp', index=False)
+            os.replace(destino + '.tmp', destino)
+            periodos.append(periodo)
+
+    # Periodos que la versión anterior del archivo aportaba y la nueva ya no trae
+    for periodo in set(anterior['periodos'] if anterior else []) - set(periodos):
+        retirado = _ruta_aporte(directorio, hecho, periodo, fuente)
+        if os.path.exists(retirado):
+            os.remove(retirado)
+
+    manifiesto['fuentes'][fuente] = {'firma': firma, 'filas': total_filas, 'periodos': sorted(periodos)}
+    manifiesto['version'] += 1
+    datos.escribir_manifiesto(directorio, manifiesto)
+    return {'archivo': ruta, 'omitido': False, 'reemplazado': anterior is not None,
+            'filas': total_filas, 'periodos': sorted(periodos)}
+
+
+def version(directorio=DIRECTORIO_INGESTA):
+    """Contador que cambia con cada ingesta; sirve de versión de los datos agregados."""
+    return _manifiesto(directorio)['version']
+
+
+def periodos_ingeridos(hecho, directorio=DIRECTORIO_INGESTA):
+    """{año: [aportes de los periodos del año]} de un hecho."""
+    carpeta = os.path.join(directorio, hecho)
+    if not os.path.isdir(carpeta):
+        return {}
+    por_año = {}
+    for periodo in sorted(os.listdir(carpeta)):
+        aportes = [os.path.join(carpeta, periodo, archivo)
+                   for archivo in sorted(os.listdir(os.path.join(carpeta, periodo)))
+                   if archivo.endswith('.parquet')]
+        if aportes:
+            por_año.setdefault(int(periodo[:4]), []).extend(aportes)
+    return por_año
+
+
+def hoja_ingerida(hecho, archivos):
+    """Periodos ingeridos de un año con el formato de la hoja anual (`Mes` + columnas de la hoja)."""
+    reglas = AGREGACIONES[hecho]
+    agregado = _combinar([pd.read_parquet(archivo) for archivo in archivos], hecho)
+    for medida in reglas['medias']:
+        agregado[medida] = agregado[medida] / agregado['Filas']
+    columnas = datos.esquema_de_hoja(hecho)['columnas']
+    return agregado[list(columnas)]
+
+
+class HojasConIngesta(Mapping):
+    """Hojas del libro con los periodos ingeridos agregados.
+
+    Cada hoja anual (`DEMANDA_2025`, ...) incluye los meses ingeridos de ese
+    año; si un mes también está en el libro, manda el extracto. Los años
+    que sólo existen en la ingesta aparecen como hojas nuevas.
+    """
+
+    def __init__(self, hojas, directorio=DIRECTORIO_INGESTA):
+        self.hojas = hojas
+        self.ingeridas = {f"{hecho}_{año}": (hecho, archivos)
+                          for hecho in AGREGACIONES
+                          for año, archivos in periodos_ingeridos(hecho, directorio).items()}
+        self._nombres = list(hojas) + [nombre for nombre in self.ingeridas if nombre not in hojas]
+
+    def __getitem__(self, nombre):
+        if nombre not in self.ingeridas:
+            return self.hojas[nombre]
+
+        hecho, archivos = self.ingeridas[nombre]
+        nuevas = hoja_ingerida(hecho, archivos)
+        if nombre in self.hojas:
+            base = self.hojas[nombre]
+            claves = datos.esquema_de_hoja(hecho)['claves']
+            reemplazadas = base.set_index(claves).index.isin(nuevas.set_index(claves).index)
+            nuevas = pd.concat([base[~reemplazadas], nuevas[base.columns]], ignore_index=True)
+        return datos.validar_hoja(nombre, nuevas)
+
+    def __iter__(self):
+        return iter(self._nombres)
+
+    def __len__(self):
+        return len(self._nombres)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Ingesta por bloques de extractos mensuales (xlsx o csv).")
+    parser.add_argument('hecho', choices=list(AGREGACIONES))
+    parser.add_argument('archivos', nargs='+')
+    parser.add_argument('--hoja', default=None, help="Hoja del xlsx (por defecto la activa)")
+    parser.add_argument('--filas', type=int, default=FILAS_POR_BLOQUE, help="Filas por bloque")
+    args = parser.parse_args()
+
+    for archivo in args.archivos:
+        resultado = ingerir(archivo, args.hecho, args.hoja, filas=args.filas)
+        if resultado['omitido']:
+            print(f"{archivo}: ya ingerido, se omite")
+        else:
+            nota = " (reemplaza el aporte anterior del archivo)" if resultado['reemplazado'] else ""
+            print(f"{archivo}: {resultado['filas']:,} filas -> periodos {', '.join(resultado['periodos'])}{nota}")
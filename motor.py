@@ -0,0 +1,497 @@
+import argparse
+import itertools
+import os
+import shutil
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import capacidad
+import costeo
+import cubo
+import datos
+import ingesta
+import optimizacion
+import pronostico
+import simulacion
+
+# Motor de cálculo sin Streamlit: las mismas tablas que muestra el dashboard, para
+# todos los años y productos, escritas como reportes (un Parquet por reporte).
+DIRECTORIO_REPORTES = os.path.join(datos.DIRECTORIO_CACHE, 'reportes')
+# Cada corrida escribe en su propia carpeta bajo `corridas/`; el manifiesto apunta a la vigente.
+# Se conservan las últimas para que un lector que abrió la anterior pueda terminar de leerla.
+CORRIDAS = 'corridas'
+CORRIDAS_CONSERVADAS = 2
+ARCHIVO_EXCEL_REPORTES = 'reportes.xlsx'
+
+# Grilla del barrido de escenarios: {parámetro: (bajo, alto)}, en el orden de simulacion.PARAMETROS
+RANGOS_BARRIDO = {
+    'reduccion_insumos': (0, 30),
+    'eficiencia_procesos': (0, 20),
+    'aumento_precio': (0, 25),
+    'volumen': (100, 5000),
+}
+
+# Parámetros de la corrida por defecto (los valores iniciales del dashboard)
+PARAMETROS = {
+    'enteros': False,
+    'cumplir_minimo': False,
+    'minutos_por_operario': optimizacion.MINUTOS_POR_OPERARIO,
+    'ensayos': 10_000,
+    'semilla': 0,
+    'rangos_barrido': RANGOS_BARRIDO,
+    'pasos_barrido': 21,
+    'valores_base_barrido': {'reduccion_insumos': 0, 'eficiencia_procesos': 0, 'aumento_precio': 0,
+                             'volumen': 1000},
+}
+BINS_HISTOGRAMA = 60
+TOP_N = 10
+
+
+def firma_datos(file_path=datos.ARCHIVO_EXCEL):
+    """Versión de los datos: (firma del Excel, versión de la ingesta)."""
+    return (datos.firma_archivo(file_path), ingesta.version())
+
+
+def cargar_modelo(file_path=datos.ARCHIVO_EXCEL):
+    """Modelo perezoso del libro más los periodos ingeridos."""
+    return datos.ModeloPerezoso(ingesta.HojasConIngesta(datos.Catalogo(file_path)))
+
+
+def modelo_proyectado(modelo):
+    """Modelo con los años pronosticados (para capacidad y plan de producción)."""
+    return pronostico.modelo_proyectado(modelo, pronostico.pronostico_modelo(modelo))
+
+
+# ===== CÁLCULOS (DataFrames y números; las figuras las arma el dashboard) =====
+
+def resumen_costos(cubo_costos, año, categorias=()):
+    """Métricas y tablas de la página de costos para un año y un filtro de categorías."""
+    filtros = {'Año': año}
+    if categorias:
+        filtros['Categoria'] = list(categorias)
+    filtros_años = {clave: valor for clave, valor in filtros.items() if clave != 'Año'}
+    return {
+        'totales': cubo.consultar(cubo_costos, filtros=filtros).iloc[0],
+        'mensual': cubo.consultar(cubo_costos, ['Mes'], filtros),
+        'por_categoria': cubo.consultar(cubo_costos, ['Categoria'], filtros),
+        # Comparación entre años (roll-up a Año x Categoria, sin filtrar el año)
+        'por_año': cubo.consultar(cubo_costos, ['Año', 'Categoria'], filtros_años),
+        'top_margen': cubo.top_n(cubo_costos, 'Margen_Porcentaje', TOP_N, filtros),
+        'top_absoluto': cubo.top_n(cubo_costos, 'Margen(S/)', TOP_N, filtros),
+    }
+
+
+def plan_año(proyeccion, año, enteros=False, cumplir_minimo=False, minutos_por_operario=None):
+    """Plan de producción óptimo del año con el resumen por producto."""
+    plan = optimizacion.optimizar_produccion(proyeccion, año, enteros=enteros, cumplir_minimo=cumplir_minimo,
+                                             minutos_por_operario=minutos_por_operario)
+    if plan['exito']:
+        plan['plan_productos'] = _plan_productos(plan['plan'])
+    return plan
+
+
+def _plan_productos(plan):
+    return plan.groupby('Nombre_Producto').agg({
+        'Produccion': 'sum',
+        'Margen(S/)': 'sum'
+    }).reset_index().sort_values('Margen(S/)', ascending=False)
+
+
+def riesgo_año(modelo, año, ensayos=10_000, semilla=0, workers=None):
+    """Monte Carlo del año; de la utilidad sólo se guarda el histograma, no los ensayos."""
+    parametros = simulacion.parametros_riesgo(modelo, año)
+    resultado = simulacion.monte_carlo(parametros, ensayos=ensayos, semilla=semilla, workers=workers)
+    conteos, bordes = np.histogram(resultado.pop('utilidad'), bins=BINS_HISTOGRAMA)
+    resultado['histograma'] = pd.DataFrame({'Utilidad': (bordes[:-1] + bordes[1:]) / 2, 'Ensayos': conteos})
+    return resultado
+
+
+def barrido_año(modelo, año, rangos, pasos):
+    """Barrido de escenarios del año: `pasos` valores en cada rango de {parámetro: (bajo, alto)}."""
+    base = simulacion.costos_base(modelo, año)
+    grillas = {parametro: np.linspace(bajo, alto, pasos) for parametro, (bajo, alto) in rangos.items()}
+    return simulacion.barrido_escenarios(base, **grillas)
+
+
+def tornado_año(modelo, año, valores_base, rangos):
+    """Sensibilidad de la utilidad total (tornado) y la utilidad total con `valores_base`."""
+    base = simulacion.costos_base(modelo, año)
+    sensibilidad = simulacion.tornado(base, valores_base, rangos)
+    return sensibilidad, simulacion.barrido_escenarios(base, **valores_base)['utilidad'].sum()
+
+
+# ===== CORRIDA POR LOTES =====
+
+# Modelos de cada proceso del pool, por firma: se cargan una vez y sirven a todas sus tareas
+_modelos = {}
+# Distingue las corridas de un mismo proceso dentro del mismo segundo
+_numero_corrida = itertools.count()
+
+
+def _modelos_proceso(firma, file_path):
+    if firma not in _modelos:
+        modelo = cargar_modelo(file_path)
+        _modelos[firma] = (modelo, modelo_proyectado(modelo))
+    return _modelos[firma]
+
+
+def _con_año(df, año):
+    return df.assign(Año=año)[['Año'] + [c for c in df.columns if c != 'Año']]
+
+
+def _procesar_año(firma, file_path, año, parametros, con_riesgo):
+    """Reportes de un año: plan óptimo y, si el año tiene datos históricos, riesgo y barrido."""
+    modelo, proyeccion = _modelos_proceso(firma, file_path)
+    tablas = {}
+
+    plan = plan_año(proyeccion, año, parametros['enteros'], parametros['cumplir_minimo'],
+                    parametros['minutos_por_operario'])
+    tablas['plan_resumen'] = pd.DataFrame([{
+        'Año': año,
+        'Exito': plan['exito'],
+        'Mensaje': plan['mensaje'],
+        'Margen_Total(S/)': plan.get('margen_total', np.nan),
+        'Unidades_Totales': plan.get('unidades_totales', np.nan),
+    }])
+    if plan['exito']:
+        tablas['plan_produccion'] = _con_año(plan['plan'], año)
+        tablas['plan_capacidad'] = _con_año(plan['uso_capacidad'], año)
+
+    if con_riesgo:
+        # Un solo proceso por año: el pool ya reparte los años entre los núcleos
+        mc = riesgo_año(modelo, año, parametros['ensayos'], parametros['semilla'], workers=1)
+        tablas['riesgo_resumen'] = pd.DataFrame([{
+            'Año': año,
+            'Prob_Exceso_Capacidad': mc['prob_exceso_capacidad'],
+            **{f"Utilidad_P{p}": v for p, v in mc['percentiles_utilidad'].items()},
+            **{f"Utilizacion_P{p}": v for p, v in mc['percentiles_utilizacion'].items()},
+        }])
+        tablas['riesgo_histograma'] = _con_año(mc['histograma'], año)
+        tablas['riesgo_capacidad'] = _con_año(mc['capacidad'], año)
+
+        # Del barrido sólo se guarda el margen (R, E, A): la utilidad es margen x volumen
+        rangos = parametros['rangos_barrido']
+        resultado = barrido_año(modelo, año, rangos, parametros['pasos_barrido'])
+        grillas = np.meshgrid(*(resultado['ejes'][p] for p in simulacion.PARAMETROS[:3]), indexing='ij')
+        tablas['barrido_margen'] = pd.DataFrame({
+            'Año': año,
+            **{p: grilla.ravel() for p, grilla in zip(simulacion.PARAMETROS, grillas)},
+            'Margen(S/)': resultado['margen'].ravel(),
+            'Margen_Porcentaje': resultado['margen_porcentaje'].ravel(),
+        })
+        sensibilidad, total_base = tornado_año(modelo, año, parametros['valores_base_barrido'], rangos)
+        tablas['barrido_tornado'] = _con_año(sensibilidad, año)
+        tablas['barrido_resumen'] = pd.DataFrame([{
+            'Año': año,
+            'Escenarios': resultado['escenarios'],
+            'Utilidad_Base': total_base,
+        }])
+    return tablas
+
+
+def _reportes_generales(modelo, proyeccion):
+    """Reportes que cubren todos los años en una sola pasada (cubo, costo estándar, capacidad)."""
+    tablas = {}
+    cubo_costos = cubo.construir_cubo(modelo)
+    tablas['costos_anuales'] = cubo.consultar(cubo_costos, ['Año'])
+    tablas['costos_mensuales'] = cubo.consultar(cubo_costos, ['Año', 'Mes'])
+    tablas['margen_categoria'] = cubo.consultar(cubo_costos, ['Año', 'Categoria'])
+
+    margen = cubo.consultar(cubo_costos, ['Año', 'ID_Producto', 'Categoria', 'Linea'])
+    por_año = margen.groupby('Año')
+    margen['Ranking_Margen_Porcentaje'] = por_año['Margen_Porcentaje'].rank(ascending=False, method='min')
+    margen['Ranking_Margen'] = por_año['Margen(S/)'].rank(ascending=False, method='min')
+    tablas['margen_productos'] = margen.sort_values(['Año', 'Ranking_Margen_Porcentaje'], ignore_index=True)
+
+    tablas['costo_estandar'] = costeo.costos_estandar(costeo.construir_rollup(modelo)).merge(
+        modelo['PRODUCTOS'][['ID_Producto', 'Nombre_Producto']], on='ID_Producto'
+    )
+
+    usos, rankings = [], []
+    for medida in capacidad.MEDIDAS_DEMANDA:
+        for año, uso in capacidad.utilizacion_por_año(proyeccion, medida).items():
+            usos.append(uso.assign(Medida=medida))
+            rankings.append(_con_año(capacidad.cuellos_de_botella(uso), año).assign(Medida=medida))
+    tablas['utilizacion'] = pd.concat(usos, ignore_index=True)
+    tablas['cuellos_de_botella'] = pd.concat(rankings, ignore_index=True)
+    return tablas
+
+
+def directorio_corrida(directorio=DIRECTORIO_REPORTES, corrida=None):
+    """Carpeta de una corrida (por defecto, la vigente según el manifiesto); None si no hay."""
+    if corrida is None:
+        manifiesto = datos.leer_manifiesto(directorio)
+        corrida = manifiesto.get('corrida') if manifiesto else None
+    return os.path.join(directorio, CORRIDAS, corrida) if corrida else None
+
+
+def _limpiar_corridas(directorio, vigente):
+    """Borra las corridas antiguas, salvo la vigente y las CORRIDAS_CONSERVADAS más recientes."""
+    raiz = os.path.join(directorio, CORRIDAS)
+    antiguas = sorted(os.listdir(raiz))[:-CORRIDAS_CONSERVADAS]
+    for corrida in antiguas:
+        if corrida != vigente:
+            shutil.rmtree(os.path.join(raiz, corrida), ignore_errors=True)
+
+
+def ejecutar(file_path=datos.ARCHIVO_EXCEL, directorio=DIRECTORIO_REPORTES, workers=None, excel=False,
+             **parametros):
+    """Calcula todos los reportes y los escribe en una corrida nueva bajo `directorio`.
+
+    Cada año (histórico o pronosticado) es una tarea del pool de procesos:
+    plan de producción y, para los años históricos, simulación de riesgo
+    y barrido de escenarios (con su tornado). Dentro de una tarea todos los productos se resuelven juntos. Mientras
+    el pool trabaja, este proceso arma los reportes que abarcan todos los
+    años. Los Parquet van a `corridas/<corrida>/` y ninguna corrida
+    anterior se modifica; el manifiesto, escrito al final de forma
+    atómica, pasa a apuntar a la nueva. Así un lector ve siempre los
+    reportes y los parámetros de una misma corrida completa.
+    """
+    parametros = {**PARAMETROS, **parametros}
+    inicio = time.perf_counter()
+    firma = firma_datos(file_path)
+    # Se carga (y se pronostica) aquí primero: la caché columnar y los parámetros del
+    # pronóstico quedan en disco y los procesos del pool sólo los leen.
+    modelo, proyeccion = _modelos_proceso(firma, file_path)
+    años_historicos = datos.años_disponibles(modelo)
+    años = datos.años_disponibles(proyeccion)
+
+    workers = workers or os.cpu_count() or 1
+    argumentos = [(firma, file_path, año, parametros, año in años_historicos) for año in años]
+    if workers == 1:
+        tablas = _reportes_generales(modelo, proyeccion)
+        por_año = [_procesar_año(*args) for args in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(años))) as pool:
+            futuros = [pool.submit(_procesar_año, *args) for args in argumentos]
+            tablas = _reportes_generales(modelo, proyeccion)
+            por_año = [futuro.result() for futuro in futuros]
+
+    for nombre in dict.fromkeys(nombre for resultado in por_año for nombre in resultado):
+        tablas[nombre] = pd.concat([r[nombre] for r in por_año if nombre in r], ignore_index=True)
+
+    corrida = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_numero_corrida):03d}"
+    carpeta = directorio_corrida(directorio, corrida)
+    os.makedirs(carpeta)
+    for nombre, df in tablas.items():
+        df.to_parquet(os.path.join(carpeta, f"{nombre}.parquet"), index=False)
+    if excel:
+        with pd.ExcelWriter(os.path.join(carpeta, ARCHIVO_EXCEL_REPORTES), engine='openpyxl') as writer:
+            for nombre, df in tablas.items():
+                df.to_excel(writer, sheet_name=nombre[:31], index=False)
+
+    manifiesto = {
+        'corrida': corrida,
+        'firma': list(firma),
+        'generado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'duracion_s': round(time.perf_counter() - inicio, 3),
+        'parametros': parametros,
+        'años': años,
+        'reportes': list(tablas),
+    }
+    # La corrida guarda su propio manifiesto; el de `directorio` se escribe al final
+    datos.escribir_manifiesto(carpeta, manifiesto)
+    datos.escribir_manifiesto(directorio, manifiesto)
+    _limpiar_corridas(directorio, corrida)
+    return tablas
+
+
+# ===== LECTURA DE LOS REPORTES (dashboard) =====
+
+def version_reportes(directorio=DIRECTORIO_REPORTES):
+    """Identificador de la corrida vigente (None si no hay); cambia con cada corrida."""
+    manifiesto = datos.leer_manifiesto(directorio)
+    return manifiesto.get('corrida') if manifiesto else None
+
+
+class Reportes(Mapping):
+    """Reportes de la última corrida como un diccionario perezoso {reporte: DataFrame}.
+
+    `corrida` (por defecto, la vigente) fija la carpeta: los parámetros y
+    las tablas salen del manifiesto y los Parquet de esa corrida, aunque
+    después termine otra. Si la corrida se hizo con otros datos (otra
+    `firma`) o no existe, queda vacío y el dashboard calcula en línea con
+    las mismas funciones.
+    """
+
+    def __init__(self, firma, directorio=DIRECTORIO_REPORTES, corrida=None):
+        self.directorio = directorio_corrida(directorio, corrida)
+        manifiesto = datos.leer_manifiesto(self.directorio) if self.directorio else None
+        vigente = manifiesto is not None and manifiesto['firma'] == list(firma)
+        self.generado = manifiesto['generado'] if vigente else None
+        self.parametros = manifiesto['parametros'] if vigente else {}
+        self._nombres = manifiesto['reportes'] if vigente else []
+        self._tablas = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, nombre):
+        if nombre not in self._nombres:
+            raise KeyError(nombre)
+        with self._lock:
+            if nombre not in self._tablas:
+                self._tablas[nombre] = pd.read_parquet(os.path.join(self.directorio, f"{nombre}.parquet"))
+            return self._tablas[nombre]
+
+    def __iter__(self):
+        return iter(self._nombres)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def cubre(self, **parametros):
+        """Indica si la corrida se hizo con estos parámetros."""
+        return bool(self._nombres) and all(self.parametros.get(k) == v for k, v in parametros.items())
+
+
+def _del_año(df, año):
+    return df[df['Año'] == año].drop(columns='Año').reset_index(drop=True)
+
+
+def costos_guardados(reportes, año, categorias=()):
+    """El resultado de `resumen_costos` leído de los reportes, o None si no está.
+
+    Los reportes guardan los promedios de todas las categorías; con un
+    filtro de categorías se consulta el cubo en línea.
+    """
+    if categorias or 'costos_anuales' not in reportes:
+        return None
+    anuales = _del_año(reportes['costos_anuales'], año)
+    if anuales.empty:
+        return None
+    categoria = reportes['margen_categoria']
+    # Mismo orden que `cubo.top_n` (por producto) para que los empates se resuelvan igual
+    productos = _del_año(reportes['margen_productos'], año).drop(
+        columns=['Ranking_Margen_Porcentaje', 'Ranking_Margen']
+    ).sort_values('ID_Producto', ignore_index=True)
+    return {
+        'totales': anuales.iloc[0],
+        'mensual': _del_año(reportes['costos_mensuales'], año),
+        'por_categoria': _del_año(categoria, año),
+        'por_año': categoria,
+        'top_margen': productos.nlargest(TOP_N, 'Margen_Porcentaje').reset_index(drop=True),
+        'top_absoluto': productos.nlargest(TOP_N, 'Margen(S/)').reset_index(drop=True),
+    }
+
+
+def costo_estandar_guardado(reportes):
+    """Costo estándar por producto (precios de insumos vigentes) leído de los reportes, o None."""
+    return reportes['costo_estandar'] if 'costo_estandar' in reportes else None
+
+
+def _rangos_manifiesto(rangos):
+    # Como quedan en el manifiesto JSON: {parámetro: [bajo, alto]}
+    return {parametro: list(rango) for parametro, rango in dict(rangos).items()}
+
+
+def barrido_guardado(reportes, año, rangos, pasos):
+    """El resultado de `barrido_año` leído de los reportes, o None si no está."""
+    if (not reportes.cubre(rangos_barrido=_rangos_manifiesto(rangos), pasos_barrido=pasos)
+            or 'barrido_margen' not in reportes):
+        return None
+    margen = _del_año(reportes['barrido_margen'], año)
+    if margen.empty:
+        return None
+    resumen = _del_año(reportes['barrido_resumen'], año).iloc[0]
+    rangos = dict(rangos)
+    ejes = {p: np.linspace(*rangos[p], pasos) for p in simulacion.PARAMETROS}
+    forma = (pasos, pasos, pasos, 1)
+    total = margen['Margen(S/)'].to_numpy().reshape(forma)
+    return {
+        'ejes': ejes,
+        'escenarios': int(resumen['Escenarios']),
+        'margen': total,
+        'margen_porcentaje': margen['Margen_Porcentaje'].to_numpy().reshape(forma),
+        'utilidad': total * ejes['volumen'],
+    }
+
+
+def tornado_guardado(reportes, año, valores_base, rangos):
+    """El resultado de `tornado_año` leído de los reportes, o None si no está."""
+    if (not reportes.cubre(rangos_barrido=_rangos_manifiesto(rangos), valores_base_barrido=dict(valores_base))
+            or 'barrido_tornado' not in reportes):
+        return None
+    resumen = _del_año(reportes['barrido_resumen'], año)
+    if resumen.empty:
+        return None
+    return _del_año(reportes['barrido_tornado'], año), resumen['Utilidad_Base'].iloc[0]
+
+
+def plan_guardado(reportes, año, enteros, cumplir_minimo, minutos_por_operario=None):
+    """El resultado de `plan_año` leído de los reportes, o None si no está."""
+    if not reportes.cubre(enteros=enteros, cumplir_minimo=cumplir_minimo,
+                          minutos_por_operario=minutos_por_operario):
+        return None
+    resumen = reportes['plan_resumen']
+    resumen = resumen[resumen['Año'] == año]
+    if resumen.empty:
+        return None
+    fila = resumen.iloc[0]
+    plan = {'estado': None, 'mensaje': fila['Mensaje'], 'exito': bool(fila['Exito'])}
+    if plan['exito']:
+        plan.update({
+            'margen_total': fila['Margen_Total(S/)'],
+            'unidades_totales': fila['Unidades_Totales'],
+            'plan': _del_año(reportes['plan_produccion'], año),
+            'uso_capacidad': _del_año(reportes['plan_capacidad'], año),
+        })
+        plan['plan_productos'] = _plan_productos(plan['plan'])
+    return plan
+
+
+def riesgo_guardado(reportes, año, ensayos, semilla):
+    """El resultado de `riesgo_año` leído de los reportes, o None si no está."""
+    if not reportes.cubre(ensayos=ensayos, semilla=semilla) or 'riesgo_resumen' not in reportes:
+        return None
+    resumen = reportes['riesgo_resumen']
+    resumen = resumen[resumen['Año'] == año]
+    if resumen.empty:
+        return None
+    fila = resumen.iloc[0]
+    return {
+        'ensayos': ensayos,
+        'percentiles_utilidad': {p: fila[f"Utilidad_P{p}"] for p in simulacion.PERCENTILES},
+        'percentiles_utilizacion': {p: fila[f"Utilizacion_P{p}"] for p in simulacion.PERCENTILES},
+        'prob_exceso_capacidad': float(fila['Prob_Exceso_Capacidad']),
+        'capacidad': _del_año(reportes['riesgo_capacidad'], año),
+        'histograma': _del_año(reportes['riesgo_histograma'], año),
+    }
+
+
+def utilizacion_guardada(reportes, medida):
+    """{año: utilización} de una medida de demanda leído de los reportes, o None."""
+    if 'utilizacion' not in reportes:
+        return None
+    uso = reportes['utilizacion']
+    uso = uso[uso['Medida'] == medida].drop(columns='Medida')
+    return {int(año): grupo.reset_index(drop=True) for año, grupo in uso.groupby('Año')}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Calcula los reportes del dashboard para todos los años y productos.")
+    parser.add_argument('--excel-datos', default=datos.ARCHIVO_EXCEL, help="Libro de datos de entrada")
+    parser.add_argument('--directorio', default=DIRECTORIO_REPORTES, help="Carpeta de salida de los reportes")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos del pool (por defecto, uno por núcleo)")
+    parser.add_argument('--excel', action='store_true', help=f"Escribir también {ARCHIVO_EXCEL_REPORTES}")
+    parser.add_argument('--enteros', action='store_true', help="Plan con unidades enteras (MIP)")
+    parser.add_argument('--cumplir-minimo', action='store_true', help="Plan que exige la Demanda_Minima")
+    parser.add_argument('--minutos-por-operario', type=int, default=PARAMETROS['minutos_por_operario'],
+                        help="Minutos al mes por operario para el límite de operarios (0 = sin límite)")
+    parser.add_argument('--ensayos', type=int, default=PARAMETROS['ensayos'], help="Ensayos de Monte Carlo por año")
+    parser.add_argument('--semilla', type=int, default=PARAMETROS['semilla'])
+    parser.add_argument('--pasos-barrido', type=int, default=PARAMETROS['pasos_barrido'],
+                        help="Puntos por parámetro en el barrido de escenarios")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    tablas = ejecutar(args.excel_datos, args.directorio, args.workers, args.excel,
+                      enteros=args.enteros, cumplir_minimo=args.cumplir_minimo,
+                      minutos_por_operario=args.minutos_por_operario or None,
+                      ensayos=args.ensayos, semilla=args.semilla, pasos_barrido=args.pasos_barrido)
+    for nombre, df in tablas.items():
+        print(f"{nombre}: {len(df):,} filas")
+    print(f"Reportes en {directorio_corrida(args.directorio)} ({time.perf_counter() - inicio:.1f} s)")
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+import datos
+
+# Minutos efectivos que aporta un operario en un mes (jornada de 8 h, 22 días hábiles)
+MINUTOS_POR_OPERARIO = 8 * 60 * 22
+
+
+def matrices_año(modelo, año):
+    """Arreglos densos del año: precio, costo y demanda (producto x mes), tiempos y capacidad.
+
+    Los productos siguen el orden de PRODUCTOS, los procesos el de PROCESOS y
+    los meses el orden calendario de `datos.MESES`. La capacidad sin registrar
+    queda en NaN (desconocida), no en cero.
+    """
+    productos = modelo['PRODUCTOS']['ID_Producto'].tolist()
+    procesos = modelo['PROCESOS']['ID_Proceso'].tolist()
+    meses = datos.MESES
+
+    demanda = modelo['DEMANDA'][modelo['DEMANDA']['Año'] == año]
+    costos = modelo['COSTOS'][modelo['COSTOS']['Año'] == año]
+    capacidad = modelo['CAPACIDAD'][modelo['CAPACIDAD']['Año'] == año]
+
+    def pivot(df, fila, valor, filas):
+        tabla = df.pivot_table(index=fila, columns='Mes', values=valor, aggfunc='sum', observed=False)
+        return tabla.reindex(index=filas, columns=meses).to_numpy(dtype=float)
+
+    tiempos = modelo['TIEMPO_PROCESOS'].pivot_table(
+        index='ID_Producto', columns='ID_Proceso', values='Tiempo_Minutos', aggfunc='sum'
+    ).reindex(index=productos, columns=procesos).fillna(0).to_numpy(dtype=float)
+
+    return {
+        'productos': productos,
+        'procesos': procesos,
+        'meses': meses,
+        'precio': pivot(demanda, 'ID_Producto', 'Precio_Venta(S/)', productos),
+        'costo': pivot(costos, 'ID_Producto', 'Costo_Total(S/)', productos),
+        'demanda_min': np.nan_to_num(pivot(demanda, 'ID_Producto', 'Demanda_Minima', productos)),
+        'demanda_max': np.nan_to_num(pivot(demanda, 'ID_Producto', 'Demanda_Maxima', productos)),
+        'tiempos': tiempos,
+        'minutos': pivot(capacidad, 'ID_Proceso', 'Minutos_Disponibles', procesos),
+        'operarios': pivot(capacidad, 'ID_Proceso', 'Operarios_Disponibles', procesos),
+    }
+
+
+def optimizar_produccion(modelo, año, enteros=False, cumplir_minimo=True, minutos_por_operario=None):
+    """Plan de producción que maximiza el margen de todos los productos en un año.
+
+    Variables x[p, m]: unidades del producto p en el mes m, acotadas por
+    Demanda_Minima (si `cumplir_minimo`) y Demanda_Maxima. Para cada proceso
+    j y mes m se exige  sum_p Tiempo[p, j] * x[p, m] <= capacidad[j, m],  donde
+    la capacidad son los Minutos_Disponibles y, si se indica
+    `minutos_por_operario`, también Operarios_Disponibles * minutos_por_operario.
+    Los procesos y meses sin capacidad registrada no se restringen; su
+    utilización queda en NaN. Con `enteros=True` se resuelve como MIP
+    (unidades enteras).
+    """
+    m = matrices_año(modelo, año)
+    n_prod, n_proc, n_mes = len(m['productos']), len(m['procesos']), len(m['meses'])
+
+    margen_unitario = np.nan_to_num(m['precio'] - m['costo'])
+    capacidad = m['minutos']
+    if minutos_por_operario is not None:
+        capacidad = np.fmin(capacidad, m['operarios'] * minutos_por_operario)
+    conocida = ~np.isnan(capacidad.ravel())
+
+    # x se aplana como p * n_mes + m  y  las filas de A como j * n_mes + m
+    A = sparse.kron(sparse.csr_matrix(m['tiempos'].T), sparse.identity(n_mes), format='csr')[conocida]
+    b = capacidad.ravel()[conocida]
+    c = -margen_unitario.ravel()
+    inferior = m['demanda_min'].ravel() if cumplir_minimo else np.zeros(n_prod * n_mes)
+    superior = m['demanda_max'].ravel()
+
+    res = linprog(
+        c, A_ub=A, b_ub=b, bounds=np.column_stack([inferior, superior]),
+        integrality=np.ones(n_prod * n_mes) if enteros else None,
+        method='highs',
+    )
+
+    resultado = {'estado': res.status, 'mensaje': res.message, 'exito': res.success}
+    if not res.success:
+        return resultado
+
+    x = res.x.reshape(n_prod, n_mes)
+    requeridos = m['tiempos'].T @ x
+
+    nombres = modelo['PRODUCTOS'].set_index('ID_Producto')['Nombre_Producto']
+    plan = pd.DataFrame({
+        'ID_Producto': np.repeat(m['productos'], n_mes),
+        'Mes': pd.Categorical(np.tile(m['meses'], n_prod), dtype=datos.TIPO_MES),
+        'Produccion': x.ravel(),
+        'Margen_Unitario(S/)': margen_unitario.ravel(),
+    })
+    plan['Nombre_Producto'] = plan['ID_Producto'].map(nombres)
+    plan['Margen(S/)'] = plan['Produccion'] * plan['Margen_Unitario(S/)']
+
+    uso = pd.DataFrame({
+        'ID_Proceso': np.repeat(m['procesos'], n_mes),
+        'Mes': pd.Categorical(np.tile(m['meses'], n_proc), dtype=datos.TIPO_MES),
+        'Minutos_Requeridos': requeridos.ravel(),
+        'Minutos_Disponibles': capacidad.ravel(),
+    })
+    uso['Utilizacion'] = np.divide(uso['Minutos_Requeridos'], uso['Minutos_Disponibles'],
+                                   out=np.where(conocida, 0.0, np.nan), where=uso['Minutos_Disponibles'] > 0)
+    if not enteros:
+        # Precio sombra: margen adicional por minuto extra de capacidad
+        uso['Precio_Sombra(S/min)'] = np.nan
+        uso.loc[conocida, 'Precio_Sombra(S/min)'] = -res.ineqlin.marginals
+    uso = uso.merge(modelo['PROCESOS'][['ID_Proceso', 'Nombre_Proceso']], on='ID_Proceso')
+
+    resultado.update({
+        'margen_total': -res.fun,
+        'unidades_totales': x.sum(),
+        'plan': plan,
+        'uso_capacidad': uso,
+    })
+    return resultado
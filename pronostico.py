@@ -0,0 +1,240 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+import datos
+
+PERIODO = 12
+SERIES = ['Demanda_Minima', 'Demanda_Maxima']
+MODELOS = ['Holt-Winters', 'Estacional Ingenuo']
+Z_95 = 1.96
+
+# Grilla de parámetros de suavizamiento que se evalúa para todas las series a la vez
+GRILLA_ALPHA = [0.05, 0.1, 0.2, 0.3, 0.5, 0.7, 0.9]
+GRILLA_BETA = [0.0, 0.01, 0.05, 0.1, 0.2]
+GRILLA_GAMMA = [0.05, 0.1, 0.2, 0.3, 0.5]
+VERSION = 1
+
+
+def series_demanda(modelo):
+    """Matriz de series mensuales: una fila por (ID_Producto, Serie), una columna por periodo.
+
+    Parte de la capa de series de tiempo de `datos`; los meses faltantes se
+    completan con el último valor observado.
+    """
+    mensuales = datos.construir_series(modelo)
+    series = pd.concat({serie: mensuales[serie] for serie in SERIES}, axis=1).T
+    series.index.names = ['Serie', 'ID_Producto']
+    series = series.swaplevel().sort_index()
+    return series.ffill(axis=1).bfill(axis=1).astype(float)
+
+
+def _holt_winters(y, alpha, beta, gamma):
+    """Holt-Winters aditivo para todas las series y combinaciones de parámetros.
+
+    `y` es (series, tiempo); `alpha`, `beta`, `gamma` son (combinaciones, 1).
+    Se recorre el tiempo, pero cada paso está vectorizado sobre
+    combinaciones x series. Devuelve el SSE de los errores a un paso
+    (desde la segunda temporada) y los estados finales.
+    """
+    n_series, n_tiempo = y.shape
+    forma = (alpha.shape[0], n_series)
+
+    nivel = np.broadcast_to(y[:, :PERIODO].mean(axis=1), forma).copy()
+    if n_tiempo >= 2 * PERIODO:
+        tendencia = (y[:, PERIODO:2 * PERIODO].mean(axis=1) - y[:, :PERIODO].mean(axis=1)) / PERIODO
+    else:
+        tendencia = np.zeros(n_series)
+    tendencia = np.broadcast_to(tendencia, forma).copy()
+    estacional = np.broadcast_to(y[:, :PERIODO] - y[:, :PERIODO].mean(axis=1, keepdims=True),
+                                 forma + (PERIODO,)).copy()
+    sse = np.zeros(forma)
+
+    for t in range(n_tiempo):
+        s = estacional[..., t % PERIODO]
+        error = y[:, t] - (nivel + tendencia + s)
+        if t >= PERIODO:
+            sse += error ** 2
+        nivel_nuevo = alpha * (y[:, t] - s) + (1 - alpha) * (nivel + tendencia)
+        tendencia = beta * (nivel_nuevo - nivel) + (1 - beta) * tendencia
+        estacional[..., t % PERIODO] = gamma * (y[:, t] - nivel_nuevo) + (1 - gamma) * s
+        nivel = nivel_nuevo
+
+    return sse, nivel, tendencia, estacional
+
+
+def ajustar(series):
+    """Ajusta Holt-Winters (búsqueda en grilla) y el estacional ingenuo a todas las series.
+
+    Devuelve una tabla con los parámetros y estados finales por serie; con
+    eso basta para pronosticar sin volver a ajustar.
+    """
+    y = series.to_numpy(dtype=float)
+    n_series, n_tiempo = y.shape
+
+    grilla = np.array(np.meshgrid(GRILLA_ALPHA, GRILLA_BETA, GRILLA_GAMMA, indexing='ij')).reshape(3, -1)
+    alpha, beta, gamma = (g[:, None] for g in grilla)
+    sse, nivel, tendencia, estacional = _holt_winters(y, alpha, beta, gamma)
+
+    mejor = sse.argmin(axis=0)
+    columnas = np.arange(n_series)
+    n_errores = max(n_tiempo - PERIODO, 1)
+
+    parametros = pd.DataFrame({
+        'alpha': grilla[0, mejor],
+        'beta': grilla[1, mejor],
+        'gamma': grilla[2, mejor],
+        'nivel': nivel[mejor, columnas],
+        'tendencia': tendencia[mejor, columnas],
+        'sigma_hw': np.sqrt(sse[mejor, columnas] / n_errores),
+    }, index=series.index)
+    # Los índices estacionales quedan alineados a la posición t % PERIODO
+    for k in range(PERIODO):
+        parametros[f'estacional_{k}'] = estacional[mejor, columnas, k]
+
+    # Estacional ingenuo: repetir la última temporada
+    diferencias = y[:, PERIODO:] - y[:, :-PERIODO]
+    parametros['sigma_ingenuo'] = np.sqrt((diferencias ** 2).mean(axis=1)) if diferencias.size else 0.0
+    for k in range(PERIODO):
+        parametros[f'ultima_{k}'] = y[:, n_tiempo - PERIODO + k]
+
+    parametros['n_tiempo'] = n_tiempo
+    return parametros
+
+
+def clave_series(series):
+    """Hash de los datos y de la configuración: cambia sólo si hay que volver a ajustar."""
+    h = hashlib.sha256()
+    h.update(repr((VERSION, GRILLA_ALPHA, GRILLA_BETA, GRILLA_GAMMA)).encode())
+    h.update(repr(series.index.tolist()).encode())
+    h.update(repr(series.columns.tolist()).encode())
+    h.update(np.ascontiguousarray(series.to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()[:16]
+
+
+def ajustar_o_cargar(series, cache_dir=datos.DIRECTORIO_CACHE):
+    """Parámetros ajustados, leídos de disco si los datos no cambiaron desde el último ajuste.
+
+    Tras un ajuste nuevo se borran los parámetros de versiones anteriores de
+    los datos: sólo se conserva el archivo vigente.
+    """
+    directorio = os.path.join(cache_dir, 'pronosticos')
+    ruta = os.path.join(directorio, f'parametros_{clave_series(series)}.parquet')
+    if os.path.exists(ruta):
+        return pd.read_parquet(ruta)
+
+    parametros = ajustar(series)
+    os.makedirs(directorio, exist_ok=True)
+    parametros.to_parquet(ruta + '.tmp')
+    os.replace(ruta + '.tmp', ruta)
+
+    for archivo in os.listdir(directorio):
+        anterior = os.path.join(directorio, archivo)
+        if archivo.startswith('parametros_') and archivo.endswith('.parquet') and anterior != ruta:
+            os.remove(anterior)
+    return parametros
+
+
+def pronosticar(parametros, ultimo_periodo, horizonte=12):
+    """Pronóstico con intervalo del 95% de todas las series y ambos modelos.
+
+    `ultimo_periodo` es el Period mensual de la última observación. Sólo se
+    evalúan fórmulas cerradas sobre los parámetros guardados (no se ajusta).
+    """
+    h = np.arange(1, horizonte + 1)
+    n_tiempo = parametros['n_tiempo'].to_numpy()[:, None]
+    alpha = parametros['alpha'].to_numpy()[:, None]
+    beta = parametros['beta'].to_numpy()[:, None]
+    gamma = parametros['gamma'].to_numpy()[:, None]
+
+    estacional = parametros[[f'estacional_{k}' for k in range(PERIODO)]].to_numpy()
+    posicion = (n_tiempo - 1 + h) % PERIODO
+    hw = (parametros['nivel'].to_numpy()[:, None] + h * parametros['tendencia'].to_numpy()[:, None]
+          + np.take_along_axis(estacional, posicion, axis=1))
+
+    # Varianza de ETS(A,A,A): sigma^2 * (1 + sum_{j<h} c_j^2)
+    j = np.arange(1, horizonte)
+    c = alpha * (1 + j * beta) + (1 - alpha) * gamma * (j % PERIODO == 0)
+    var_hw = np.concatenate([np.zeros((len(parametros), 1)), np.cumsum(c ** 2, axis=1)], axis=1) + 1
+    sd_hw = parametros['sigma_hw'].to_numpy()[:, None] * np.sqrt(var_hw)
+
+    ultima = parametros[[f'ultima_{k}' for k in range(PERIODO)]].to_numpy()
+    ingenuo = ultima[:, (h - 1) % PERIODO]
+    sd_ingenuo = parametros['sigma_ingenuo'].to_numpy()[:, None] * np.sqrt((h - 1) // PERIODO + 1)
+
+    futuros = pd.period_range(ultimo_periodo + 1, periods=horizonte, freq='M')
+    años = futuros.year
+    meses = [datos.MESES[k - 1] for k in futuros.month]
+
+    tablas = []
+    for nombre, punto, sd in [('Holt-Winters', hw, sd_hw), ('Estacional Ingenuo', ingenuo, sd_ingenuo)]:
+        tablas.append(pd.DataFrame({
+            'ID_Producto': np.repeat(parametros.index.get_level_values('ID_Producto'), horizonte),
+            'Serie': np.repeat(parametros.index.get_level_values('Serie'), horizonte),
+            'Modelo': nombre,
+            'Año': np.tile(años, len(parametros)),
+            'Mes': np.tile(meses, len(parametros)),
+            'Pronostico': np.maximum(punto, 0).ravel(),
+            'Inferior': np.maximum(punto - Z_95 * sd, 0).ravel(),
+            'Superior': (punto + Z_95 * sd).ravel(),
+        }))
+    pronostico = pd.concat(tablas, ignore_index=True)
+    pronostico['Mes'] = pronostico['Mes'].astype(datos.TIPO_MES)
+    pronostico['Periodo'] = datos.periodos(pronostico['Año'], pronostico['Mes'])
+    return pronostico
+
+
+def pronostico_modelo(modelo, horizonte=12, cache_dir=datos.DIRECTORIO_CACHE):
+    """Ajusta (o reutiliza) y pronostica todas las series de demanda del modelo."""
+    series = series_demanda(modelo)
+    parametros = ajustar_o_cargar(series, cache_dir)
+    return pronosticar(parametros, series.columns[-1], horizonte)
+
+
+def _completar_periodos(hecho, periodos):
+    """Filas para los (Año, Mes) de `periodos` que faltan en `hecho`.
+
+    Cada mes se copia del último año que tiene ese mes calendario, así que
+    un año recién agregado por la ingesta (sólo algunos meses) no se
+    duplica ni deja sin base a los meses que le faltan.
+    """
+    presentes = hecho[['Año', 'Mes']].drop_duplicates().assign(_presente=True)
+    faltantes = periodos.merge(presentes, on=['Año', 'Mes'], how='left')
+    faltantes = faltantes.loc[faltantes['_presente'].isna(), ['Año', 'Mes']]
+
+    ultimo = hecho.groupby('Mes', observed=True)['Año'].max().reset_index()
+    base = hecho.merge(ultimo, on=['Mes', 'Año']).drop(columns=['Año', 'Periodo'])
+    copia = faltantes.merge(base, on='Mes')
+    copia['Periodo'] = datos.periodos(copia['Año'], copia['Mes'])
+    return copia
+
+
+def modelo_proyectado(modelo, pronostico, nombre_modelo='Holt-Winters'):
+    """Copia del modelo con los años pronosticados agregados a las tablas de hechos.
+
+    La Demanda_Minima/Maxima es el pronóstico puntual de cada serie; precio,
+    costos y capacidad se toman del mismo mes del último año que lo tiene.
+    Sólo se agregan los periodos pronosticados que faltan en cada tabla.
+    Así el plan de producción y la utilización de capacidad pueden usarse
+    sobre años futuros (o sobre el resto de un año en curso).
+    """
+    futuro = pronostico[pronostico['Modelo'] == nombre_modelo].pivot_table(
+        index=['Año', 'Mes', 'ID_Producto'], columns='Serie', values='Pronostico', observed=True
+    ).reset_index()
+    futuro.columns.name = None
+    futuro['Demanda_Minima'] = futuro['Demanda_Minima'].round()
+    futuro['Demanda_Maxima'] = np.maximum(futuro['Demanda_Maxima'].round(), futuro['Demanda_Minima'])
+    periodos_futuros = futuro[['Año', 'Mes']].drop_duplicates()
+
+    demanda_futura = _completar_periodos(modelo['DEMANDA'], periodos_futuros).drop(columns=SERIES).merge(
+        futuro, on=['Año', 'Mes', 'ID_Producto']
+    )
+
+    proyectado = dict(modelo)
+    for hecho, nuevas in [('DEMANDA', demanda_futura),
+                          ('COSTOS', _completar_periodos(modelo['COSTOS'], periodos_futuros)),
+                          ('CAPACIDAD', _completar_periodos(modelo['CAPACIDAD'], periodos_futuros))]:
+        proyectado[hecho] = pd.concat([modelo[hecho], nuevas[modelo[hecho].columns]], ignore_index=True)
+    return proyectado
@@ -5,6 +5,20 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 
+import cache_calculos
+import capacidad
+import costeo
+import cubo
+import datos
+import graficos
+import ingesta
+import motor
+import optimizacion
+import pronostico
+import simulacion
+import telemetria
+from cache_calculos import memoizar
+
 # Configuración de la página
 st.set_page_config(
     page_title="Dashboard de Optimización Textil",
@@ -13,31 +27,319 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentación: cada rerun empieza una lista nueva de spans (ver panel de depuración)
+telemetria.iniciar_rerun()
+
 # Título principal
 st.title("🏭 Dashboard de Optimización Textil - ICAIEX")
 st.markdown("---")
 
+# Catálogo de hojas: el Excel se parsea una sola vez hacia Parquet y cada hoja se lee
+# y valida contra su esquema sólo cuando una sección la pide.
+# `firma` (mtime + tamaño del Excel) invalida la caché de Streamlit si el archivo cambia.
+# Los recursos se guardan sólo para la firma vigente (`max_entries=1`): cada ingesta cambia
+# la firma y la versión anterior del modelo, los índices, el cubo, etc. se libera.
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.catalogo')
+def load_catalogo(firma):
+    return datos.Catalogo(datos.ARCHIVO_EXCEL)
+
 # Cargar datos
-@st.cache_data
-def load_data():
-    # Leer todas las hojas del Excel
-    file_path = "ICAIEX_Datos_Completos_20Productos.xlsx"
-    
-    data = {}
-    sheets = [
-        'PRODUCTOS', 'INSUMOS', 'PROCESOS', 'CONSUMO_INSUMOS', 'TIEMPO_PROCESOS',
-        'DEMANDA_2021', 'DEMANDA_2022', 'DEMANDA_2023', 'DEMANDA_2024',
-        'CAPACIDAD_2021', 'CAPACIDAD_2022', 'CAPACIDAD_2023', 'CAPACIDAD_2024',
-        'COSTOS_2021', 'COSTOS_2022', 'COSTOS_2023', 'COSTOS_2024'
-    ]
-    
-    for sheet in sheets:
-        data[sheet] = pd.read_excel(file_path, sheet_name=sheet)
-    
-    return data
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.modelo')
+def load_data(firma):
+    # Tablas de hechos DEMANDA / COSTOS / CAPACIDAD con todos los años, armadas al primer uso,
+    # más los meses agregados por `ingesta.py`. `firma` es (firma del Excel, versión de la ingesta):
+    # una ingesta nueva rearma las tablas de hechos, pero el catálogo (hojas ya leídas) se reutiliza.
+    # Se comparte entre sesiones sin copiar: ningún cálculo modifica el modelo.
+    firma_excel, _ = firma
+    return datos.ModeloPerezoso(ingesta.HojasConIngesta(load_catalogo(firma_excel)))
+
+# Cargar los datos; la firma (Excel + versión de la ingesta) es la versión de los datos en todas las cachés
+firma = motor.firma_datos()
+data = load_data(firma)
+
+# Años analizables: los 12 meses de demanda, costos y capacidad. Un año en curso (ingesta
+# mensual) o sólo con demanda no sirve de base anual; se avisa y queda fuera de los selectores.
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.años')
+def load_años(firma):
+    modelo = load_data(firma)
+    completos = datos.años_disponibles(modelo)
+    todos = set().union(*(datos.años_en_hojas(modelo.hojas, prefijo) for prefijo in datos.HECHOS))
+    return completos, sorted(todos - set(completos))
+
+años_datos, años_incompletos = load_años(firma)
+if años_incompletos:
+    st.sidebar.warning(f"Años incompletos (sin los 12 meses de demanda, costos y capacidad; no se analizan): "
+                       f"{', '.join(map(str, años_incompletos))}")
+
+# Índices por producto: se construyen una vez y se comparten sin copiar
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.indices')
+def load_indices(firma):
+    return datos.construir_indices(load_data(firma))
+
+# Costo estándar por producto (lista de materiales y ruta de procesos)
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.rollup')
+def load_rollup(firma):
+    return costeo.construir_rollup(load_data(firma))
+
+# Pronóstico de demanda: los parámetros ajustados se guardan en disco y sólo se reajusta si cambian los datos
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.pronostico')
+def load_pronostico(firma):
+    tabla = pronostico.pronostico_modelo(load_data(firma))
+    return tabla, datos.por_producto(tabla, load_data(firma)['PRODUCTOS']['ID_Producto'])
+
+# Modelo con los años pronosticados agregados, para capacidad y planificación
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.proyeccion')
+def load_proyeccion(firma):
+    return pronostico.modelo_proyectado(load_data(firma), load_pronostico(firma)[0])
+
+# Capa de series de tiempo: PeriodIndex mensual, medias móviles y crecimiento interanual de todos los productos
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.series')
+def load_series(firma):
+    series = datos.construir_series(load_data(firma))
+    agregados = datos.agregaciones_series(series)
+    return agregados, datos.vistas_por_producto(series, agregados)
+
+# Cubo de costos y márgenes: todas las agregaciones de la página de costos se precalculan al cargar
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.cubo')
+def load_cubo(firma):
+    return cubo.construir_cubo(load_data(firma))
 
-# Cargar los datos
-data = load_data()
+# Reportes de la última corrida de `motor.py` (vacíos si se hizo con otros datos).
+# `version` (la corrida vigente) hace que una corrida nueva se lea sin reiniciar el dashboard.
+@st.cache_resource(max_entries=1)
+@telemetria.medido('carga.reportes')
+def load_reportes(firma, version):
+    return motor.Reportes(firma, corrida=version)
+
+# ===== CAPA DE CÁLCULO =====
+# Tablas derivadas y figuras de cada sección, memoizadas en una caché LRU compartida
+# por todas las sesiones. La clave es (sección, función, firma, parámetros): volver a
+# un año o producto ya visto no recalcula nada. Las secciones sólo dibujan.
+# Los cálculos salen del motor (`motor.py`): si su corrida por lotes cubre el año y los
+# parámetros pedidos se leen sus reportes; si no, se llama a la misma función en línea.
+
+@memoizar('resumen')
+def calculos_resumen(firma):
+    productos = load_data(firma)['PRODUCTOS']
+    cat_dist = productos['Categoria'].value_counts()
+    linea_dist = productos['Linea'].value_counts()
+    with telemetria.span('figuras'):
+        return {
+            'fig_cat': px.pie(values=cat_dist.values, names=cat_dist.index,
+                              title="Productos por Categoría"),
+            'fig_linea': px.bar(x=linea_dist.index, y=linea_dist.values,
+                                title="Productos por Línea"),
+            'fig_tiempos': graficos.caja(productos['TiempoProd_Total(min)'],
+                                         "Distribución de Tiempos de Producción", 'TiempoProd_Total(min)'),
+        }
+
+@memoizar('productos')
+def calculos_producto(firma, producto_id):
+    indices = load_indices(firma)
+    nombre = indices['producto'][producto_id]['Nombre_Producto']
+    insumos_detalle = indices['insumos'][producto_id]
+    tiempos_detalle = indices['procesos'][producto_id]
+    resultado = {'insumos': insumos_detalle, 'fig_insumos': None, 'fig_procesos': None}
+    if not insumos_detalle.empty:
+        resultado['fig_insumos'] = graficos.barras_top(insumos_detalle, x='Nombre_Insumo', y='Cantidad_Requerida',
+                                                       title=f"Insumos para {nombre}")
+    if not tiempos_detalle.empty:
+        resultado['fig_procesos'] = graficos.barras_top(tiempos_detalle, x='Nombre_Proceso', y='Tiempo_Minutos',
+                                                        title=f"Tiempos de Proceso para {nombre}")
+    return resultado
+
+@memoizar('costos')
+def calculos_costos(firma, año, categorias):
+    # Se leen los reportes del motor; con un filtro de categorías (o sin corrida) se consulta
+    # el cubo preagregado. En ningún caso se recorren las filas de COSTOS.
+    costos = motor.costos_guardados(load_reportes(firma, motor.version_reportes()), año, categorias)
+    if costos is None:
+        costos = motor.resumen_costos(load_cubo(firma), año, categorias)
+    totales = costos['totales']
+    costos_mensuales = costos['mensual']
+    
+    with telemetria.span('figuras'):
+        fig_costos = go.Figure()
+        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Costo_Total(S/)'],
+                                        name='Costo Total', line=dict(color='red')))
+        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Precio_Venta(S/)'],
+                                        name='Precio Venta', line=dict(color='green')))
+        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Margen(S/)'],
+                                        name='Margen', line=dict(color='blue')))
+        fig_costos.update_layout(title=f"Evolución de Costos y Precios - {año}")
+        
+        return {
+            'costo_promedio': totales['Costo_Total(S/)'],
+            'precio_promedio': totales['Precio_Venta(S/)'],
+            'margen_promedio': totales['Margen(S/)'],
+            'margen_porc_promedio': totales['Margen_Porcentaje'],
+            'fig_costos': fig_costos,
+            'fig_margen_cat': px.bar(costos['por_categoria'], x='Categoria', y='Margen_Porcentaje',
+                                     title=f"Margen Promedio por Categoría - {año}"),
+            'fig_margen_años': px.line(costos['por_año'], x='Año', y='Margen_Porcentaje', color='Categoria', markers=True,
+                                       title="Margen % Promedio por Año y Categoría"),
+            'fig_top_margen': px.bar(costos['top_margen'], x='Nombre_Producto', y='Margen_Porcentaje',
+                                     title="Top 10 Productos por Margen %"),
+            'fig_top_absoluto': px.bar(costos['top_absoluto'], x='Nombre_Producto', y='Margen(S/)',
+                                       title="Top 10 Productos por Margen Absoluto"),
+        }
+
+@memoizar('costos')
+def calculos_costo_estandar(firma, id_insumo, nuevo_costo):
+    # Con el precio vigente del insumo vale el costo estándar del motor; si no, se recalcula
+    costo_estandar = None
+    insumos = load_data(firma)['INSUMOS'].set_index('ID_Insumo')['Costo_Unitario(S/)']
+    if nuevo_costo == insumos[id_insumo]:
+        costo_estandar = motor.costo_estandar_guardado(load_reportes(firma, motor.version_reportes()))
+    if costo_estandar is None:
+        rollup_simulado = costeo.actualizar_insumo(load_rollup(firma), id_insumo, nuevo_costo)
+        costo_estandar = costeo.costos_estandar(rollup_simulado).merge(
+            load_data(firma)['PRODUCTOS'][['ID_Producto', 'Nombre_Producto']], on='ID_Producto'
+        )
+    return graficos.barras_top(costo_estandar, x='Nombre_Producto', y=['Costo_Insumos(S/)', 'Costo_Procesos(S/)'],
+                               title="Costo Estándar: Insumos + Procesos")
+
+@memoizar('demanda')
+def calculos_demanda(firma, producto_id):
+    indices = load_indices(firma)
+    nombre = indices['producto'][producto_id]['Nombre_Producto']
+    # Serie mensual del producto con índice de periodo (precalculada al cargar)
+    vista = load_series(firma)[1][producto_id]
+    años = datos.años_disponibles(load_data(firma), hechos=['DEMANDA'], completos=False)
+    
+    fig_demanda = go.Figure()
+    fig_demanda.add_trace(graficos.linea(vista['Fecha'], vista['Demanda_Minima'],
+                                         name='Demanda Mínima', line=dict(color='orange')))
+    fig_demanda.add_trace(graficos.linea(vista['Fecha'], vista['Demanda_Maxima'],
+                                         name='Demanda Máxima', line=dict(color='red')))
+    fig_demanda.update_layout(title=f"Demanda Mínima y Máxima por Mes - {nombre}",
+                              xaxis_title="Periodo", yaxis_title="Demanda")
+    
+    # Tendencia: medias móviles y crecimiento interanual
+    fig_tendencia = make_subplots(specs=[[{"secondary_y": True}]])
+    fig_tendencia.add_trace(go.Bar(x=vista['Fecha'], y=vista['Crecimiento_Interanual'],
+                                   name='Crecimiento Interanual (%)', marker_color='lightgray'),
+                            secondary_y=True)
+    fig_tendencia.add_trace(graficos.linea(vista['Fecha'], vista['Demanda_Media'],
+                                           name='Demanda Media', line=dict(color='gray')))
+    fig_tendencia.add_trace(graficos.linea(vista['Fecha'], vista['Media_Movil_3'],
+                                           name='Media Móvil 3 meses', line=dict(color='green')))
+    fig_tendencia.add_trace(graficos.linea(vista['Fecha'], vista['Media_Movil_12'],
+                                           name='Media Móvil 12 meses', line=dict(color='purple')))
+    fig_tendencia.update_layout(title=f"Medias Móviles y Crecimiento Interanual - {nombre}")
+    fig_tendencia.update_yaxes(title_text="Demanda", secondary_y=False)
+    fig_tendencia.update_yaxes(title_text="Crecimiento (%)", secondary_y=True)
+    
+    # Análisis estacionalidad
+    demanda_promedio = indices['demanda'][producto_id].groupby('Mes').agg({
+        'Demanda_Minima': 'mean',
+        'Demanda_Maxima': 'mean'
+    }).reset_index()
+    
+    fig_estacionalidad = go.Figure()
+    fig_estacionalidad.add_trace(go.Scatter(x=demanda_promedio['Mes'], y=demanda_promedio['Demanda_Minima'],
+                                            name='Demanda Mínima Promedio', line=dict(color='lightblue')))
+    fig_estacionalidad.add_trace(go.Scatter(x=demanda_promedio['Mes'], y=demanda_promedio['Demanda_Maxima'],
+                                            name='Demanda Máxima Promedio', line=dict(color='darkblue')))
+    fig_estacionalidad.update_layout(title=f"Patrón de Estacionalidad Promedio ({años[0]}-{años[-1]})")
+    
+    return {'fig_demanda': fig_demanda, 'fig_tendencia': fig_tendencia, 'fig_estacionalidad': fig_estacionalidad}
+
+@memoizar('demanda')
+def calculos_pronostico(firma, producto_id, modelo_pronostico):
+    nombre = load_indices(firma)['producto'][producto_id]['Nombre_Producto']
+    vista = load_series(firma)[1][producto_id]
+    pronostico_producto = load_pronostico(firma)[1][producto_id]
+    pronostico_producto = pronostico_producto[pronostico_producto['Modelo'] == modelo_pronostico]
+    
+    fig_pronostico = go.Figure()
+    colores = {'Demanda_Minima': 'orange', 'Demanda_Maxima': 'red'}
+    for serie, color in colores.items():
+        futuro = pronostico_producto[pronostico_producto['Serie'] == serie]
+        periodo_futuro = futuro['Periodo'].dt.to_timestamp()
+        fig_pronostico.add_trace(graficos.linea(vista['Fecha'], vista[serie],
+                                                name=f"{serie} (histórica)", line=dict(color=color)))
+        fig_pronostico.add_trace(go.Scatter(x=periodo_futuro, y=futuro['Superior'], line=dict(width=0),
+                                            showlegend=False, hoverinfo='skip'))
+        fig_pronostico.add_trace(go.Scatter(x=periodo_futuro, y=futuro['Inferior'], line=dict(width=0),
+                                            fill='tonexty', fillcolor='rgba(128,128,128,0.2)',
+                                            name=f"{serie} (IC 95%)"))
+        fig_pronostico.add_trace(go.Scatter(x=periodo_futuro, y=futuro['Pronostico'],
+                                            name=f"{serie} (pronóstico)", line=dict(color=color, dash='dash')))
+    fig_pronostico.update_layout(title=f"Pronóstico a 12 Meses - {nombre} ({modelo_pronostico})",
+                                 xaxis_title="Periodo", yaxis_title="Demanda")
+    return fig_pronostico
+
+@memoizar('procesos')
+def calculos_procesos(firma, año_capacidad):
+    data = load_data(firma)
+    capacidad_año = data['CAPACIDAD'][data['CAPACIDAD']['Año'] == año_capacidad]
+    
+    # Capacidad promedio por proceso
+    capacidad_proceso = capacidad_año.groupby('Nombre_Proceso').agg({
+        'Minutos_Disponibles': 'mean',
+        'Operarios_Disponibles': 'mean'
+    }).reset_index()
+    
+    with telemetria.span('figuras'):
+        return {
+            'fig_capacidad': graficos.barras_top(capacidad_proceso, x='Nombre_Proceso', y='Minutos_Disponibles',
+                                                 title=f"Capacidad Promedio por Proceso - {año_capacidad}"),
+            'fig_operarios': graficos.barras_top(capacidad_proceso, x='Nombre_Proceso', y='Operarios_Disponibles',
+                                                 title=f"Operarios por Proceso - {año_capacidad}"),
+        }
+
+@memoizar('procesos')
+def calculos_procesos_generales(firma):
+    data = load_data(firma)
+    tiempos_totales = data['TIEMPO_PROCESOS'].groupby('ID_Proceso')['Tiempo_Minutos'].sum().reset_index()
+    tiempos_totales = tiempos_totales.merge(data['PROCESOS'], on='ID_Proceso')
+    with telemetria.span('figuras'):
+        return {
+            'fig_costos_procesos': graficos.barras_top(data['PROCESOS'], x='Nombre_Proceso', y='Costo_Minuto(S/)',
+                                                       title="Costo por Minuto de Cada Proceso"),
+            'fig_tiempos_totales': graficos.barras_top(tiempos_totales, x='Nombre_Proceso', y='Tiempo_Minutos',
+                                                       title="Tiempo Total Requerido por Proceso"),
+        }
+
+@memoizar('procesos')
+def utilizacion_capacidad(firma, medida):
+    guardada = motor.utilizacion_guardada(load_reportes(firma, motor.version_reportes()), medida)
+    return guardada or capacidad.utilizacion_por_año(load_proyeccion(firma), medida)
+
+@memoizar('procesos')
+def calculos_utilizacion(firma, año_uso, medida):
+    uso_año = utilizacion_capacidad(firma, medida)[año_uso]
+    ranking = capacidad.cuellos_de_botella(uso_año)
+    fig_ranking = graficos.barras_top(ranking, x='Nombre_Proceso', y='Utilizacion_Maxima',
+                                      title="Utilización Máxima (Ranking de Cuellos de Botella)")
+    fig_ranking.add_hline(y=1, line_dash='dash', line_color='red')
+    return {
+        'ranking': ranking,
+        'fig_utilizacion': px.density_heatmap(uso_año, x='Mes', y='Nombre_Proceso', z='Utilizacion',
+                                              histfunc='sum', title=f"Utilización por Proceso y Mes - {año_uso}"),
+        'fig_ranking': fig_ranking,
+    }
+
+@memoizar('escenarios')
+def plan_optimo(firma, año, enteros, cumplir_minimo, minutos_por_operario):
+    plan = motor.plan_guardado(load_reportes(firma, motor.version_reportes()), año, enteros, cumplir_minimo,
+                               minutos_por_operario)
+    if plan is None:
+        plan = motor.plan_año(load_proyeccion(firma), año, enteros, cumplir_minimo, minutos_por_operario)
+    if plan['exito']:
+        plan['fig_uso'] = px.density_heatmap(plan['uso_capacidad'], x='Mes', y='Nombre_Proceso', z='Utilizacion',
+                                             histfunc='sum', title=f"Utilización de Capacidad - {año}")
+    return plan
 
 # Sidebar para navegación
 st.sidebar.title("📊 Navegación")
@@ -47,10 +349,65 @@ section = st.sidebar.radio(
      "📊 Análisis de Demanda", "⚙️ Análisis de Procesos", "🔍 Escenarios y Simulaciones"]
 )
 
+# `rangos` y `valores_base` llegan como tuplas de pares para que sirvan de clave
+@memoizar('escenarios')
+def barrido(firma, año, rangos, pasos):
+    resultado = motor.barrido_guardado(load_reportes(firma, motor.version_reportes()), año, rangos, pasos)
+    if resultado is None:
+        resultado = motor.barrido_año(load_data(firma), año, dict(rangos), pasos)
+    return resultado
+
+@memoizar('escenarios')
+def figuras_barrido(firma, año, rangos, pasos, eje_x, eje_y, valores_base):
+    resultado = barrido(firma, año, rangos, pasos)
+    valores_base = dict(valores_base)
+    
+    tabla = simulacion.superficie(resultado, eje_x, eje_y, medida='utilidad', fijos=valores_base)
+    fig_superficie = px.imshow(tabla, origin='lower', aspect='auto',
+                               labels=dict(x=simulacion.ETIQUETAS[eje_x], y=simulacion.ETIQUETAS[eje_y],
+                                           color='Utilidad (S/)'),
+                               title="Utilidad Total de Todos los Productos")
+    
+    tornado = motor.tornado_guardado(load_reportes(firma, motor.version_reportes()), año, valores_base, rangos)
+    if tornado is None:
+        tornado = motor.tornado_año(load_data(firma), año, valores_base, dict(rangos))
+    sensibilidad, total_base = tornado
+    sensibilidad = sensibilidad.iloc[::-1]
+    
+    fig_tornado = go.Figure()
+    fig_tornado.add_trace(go.Bar(y=sensibilidad['Parametro'], x=sensibilidad['Bajo'] - total_base,
+                                 base=total_base, orientation='h', name='Extremo bajo',
+                                 marker_color='orange'))
+    fig_tornado.add_trace(go.Bar(y=sensibilidad['Parametro'], x=sensibilidad['Alto'] - total_base,
+                                 base=total_base, orientation='h', name='Extremo alto',
+                                 marker_color='green'))
+    fig_tornado.update_layout(barmode='overlay', title="Sensibilidad de la Utilidad Total (Tornado)",
+                              xaxis_title="Utilidad (S/)")
+    return {'escenarios': resultado['escenarios'], 'fig_superficie': fig_superficie, 'fig_tornado': fig_tornado}
+
+@memoizar('escenarios')
+def riesgo(firma, año, ensayos, semilla):
+    resultado = motor.riesgo_guardado(load_reportes(firma, motor.version_reportes()), año, ensayos, semilla)
+    if resultado is None:
+        resultado = motor.riesgo_año(load_data(firma), año, ensayos, semilla)
+    resultado['fig_hist'] = px.bar(resultado['histograma'], x='Utilidad', y='Ensayos',
+                                   title=f"Distribución de la Utilidad Anual ({ensayos:,} ensayos)")
+    resultado['fig_hist'].update_layout(bargap=0)
+    resultado['fig_exceso'] = px.density_heatmap(resultado['capacidad'], x='Mes', y='ID_Proceso', z='Prob_Exceso',
+                                                 histfunc='sum',
+                                                 title="Probabilidad de Exceder Capacidad por Proceso y Mes")
+    return resultado
+
 # Función para formatear números
 def format_currency(value):
     return f"S/ {value:.2f}"
 
+# Todos los gráficos pasan por el límite de tamaño (graficos.MAX_BYTES) antes de enviarse al navegador
+def mostrar_grafico(fig):
+    with telemetria.span('grafico', titulo=fig.layout.title.text) as registro:
+        st.plotly_chart(graficos.limitar_payload(fig), use_container_width=True)
+        registro['bytes'] = fig._bytes_payload
+
 # ===== SECCIÓN 1: RESUMEN GENERAL =====
 if section == "📈 Resumen General":
     st.header("📈 Resumen General del Negocio")
@@ -71,42 +428,39 @@ if section == "📈 Resumen General":
         st.metric("Procesos Productivos", total_procesos)
     
     with col4:
-        años_cobertura = "2021-2024"
+        años_cobertura = f"{años_datos[0]}-{años_datos[-1]}"
         st.metric("Período Analizado", años_cobertura)
     
+    resumen = calculos_resumen(firma)
+    
     # Gráfico de productos por categoría
     st.subheader("📦 Distribución de Productos")
     col1, col2 = st.columns(2)
     
     with col1:
-        cat_dist = data['PRODUCTOS']['Categoria'].value_counts()
-        fig_cat = px.pie(values=cat_dist.values, names=cat_dist.index, 
-                        title="Productos por Categoría")
-        st.plotly_chart(fig_cat, use_container_width=True)
+        mostrar_grafico(resumen['fig_cat'])
     
     with col2:
-        linea_dist = data['PRODUCTOS']['Linea'].value_counts()
-        fig_linea = px.bar(x=linea_dist.index, y=linea_dist.values,
-                          title="Productos por Línea")
-        st.plotly_chart(fig_linea, use_container_width=True)
+        mostrar_grafico(resumen['fig_linea'])
     
     # Tiempos de producción
     st.subheader("⏱️ Análisis de Tiempos de Producción")
-    fig_tiempos = px.box(data['PRODUCTOS'], y='TiempoProd_Total(min)', 
-                        title="Distribución de Tiempos de Producción")
-    st.plotly_chart(fig_tiempos, use_container_width=True)
+    mostrar_grafico(resumen['fig_tiempos'])
 
 # ===== SECCIÓN 2: ANÁLISIS DE PRODUCTOS =====
 elif section == "👕 Análisis de Productos":
     st.header("👕 Análisis Detallado de Productos")
     
+    indices = load_indices(firma)
+    
     # Selector de producto
     productos = data['PRODUCTOS']['Nombre_Producto'].tolist()
     producto_seleccionado = st.selectbox("Selecciona un producto:", productos)
     
     if producto_seleccionado:
-        producto_info = data['PRODUCTOS'][data['PRODUCTOS']['Nombre_Producto'] == producto_seleccionado].iloc[0]
-        producto_id = producto_info['ID_Producto']
+        producto_id = indices['id_por_nombre'][producto_seleccionado]
+        producto_info = indices['producto'][producto_id]
+        detalle = calculos_producto(firma, producto_id)
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -120,60 +474,42 @@ elif section == "👕 Análisis de Productos":
         
         # Información de insumos
         st.subheader("📦 Insumos Requeridos")
-        insumos_producto = data['CONSUMO_INSUMOS'][data['CONSUMO_INSUMOS']['ID_Producto'] == producto_id]
-        insumos_detalle = insumos_producto.merge(data['INSUMOS'], on='ID_Insumo')
         
-        if not insumos_detalle.empty:
-            fig_insumos = px.bar(insumos_detalle, x='Nombre_Insumo', y='Cantidad_Requerida',
-                                title=f"Insumos para {producto_seleccionado}")
-            st.plotly_chart(fig_insumos, use_container_width=True)
+        if detalle['fig_insumos'] is not None:
+            mostrar_grafico(detalle['fig_insumos'])
             
             # Mostrar tabla de insumos
-            st.dataframe(insumos_detalle[['Nombre_Insumo', 'Unidad_Medida', 'Cantidad_Requerida', 'Costo_Unitario(S/)']])
+            st.dataframe(detalle['insumos'][['Nombre_Insumo', 'Unidad_Medida', 'Cantidad_Requerida', 'Costo_Unitario(S/)']])
         
         # Tiempos por proceso
         st.subheader("⚙️ Tiempos por Proceso")
-        tiempos_proceso = data['TIEMPO_PROCESOS'][data['TIEMPO_PROCESOS']['ID_Producto'] == producto_id]
-        tiempos_detalle = tiempos_proceso.merge(data['PROCESOS'], on='ID_Proceso')
         
-        if not tiempos_detalle.empty:
-            fig_procesos = px.bar(tiempos_detalle, x='Nombre_Proceso', y='Tiempo_Minutos',
-                                 title=f"Tiempos de Proceso para {producto_seleccionado}")
-            st.plotly_chart(fig_procesos, use_container_width=True)
+        if detalle['fig_procesos'] is not None:
+            mostrar_grafico(detalle['fig_procesos'])
 
 # ===== SECCIÓN 3: ANÁLISIS DE COSTOS =====
 elif section == "💰 Análisis de Costos":
     st.header("💰 Análisis de Costos y Rentabilidad")
     
-    # Selector de año
-    año = st.selectbox("Selecciona el año:", [2021, 2022, 2023, 2024])
-    
-    # Obtener datos de costos del año seleccionado
-    costos_año = data[f'COSTOS_{año}']
-    demanda_año = data[f'DEMANDA_{año}']
-    
-    # Merge para obtener información completa
-    costos_completos = costos_año.merge(demanda_año, on=['ID_Producto', 'Mes'])
-    costos_completos = costos_completos.merge(data['PRODUCTOS'][['ID_Producto', 'Nombre_Producto', 'Categoria']], on='ID_Producto')
+    # Selector de año y filtro de categorías
+    col1, col2 = st.columns(2)
+    with col1:
+        año = st.selectbox("Selecciona el año:", años_datos)
+    with col2:
+        categorias = st.multiselect("Categorías (vacío = todas):", data['PRODUCTOS']['Categoria'].cat.categories.tolist())
     
-    # Calcular margen
-    costos_completos['Margen(S/)'] = costos_completos['Precio_Venta(S/)'] - costos_completos['Costo_Total(S/)']
-    costos_completos['Margen_Porcentaje'] = (costos_completos['Margen(S/)'] / costos_completos['Precio_Venta(S/)']) * 100
+    costos = calculos_costos(firma, año, tuple(categorias))
     
     # Métricas de costos
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        costo_promedio = costos_completos['Costo_Total(S/)'].mean()
-        st.metric("Costo Promedio", format_currency(costo_promedio))
+        st.metric("Costo Promedio", format_currency(costos['costo_promedio']))
     with col2:
-        precio_promedio = costos_completos['Precio_Venta(S/)'].mean()
-        st.metric("Precio Venta Promedio", format_currency(precio_promedio))
+        st.metric("Precio Venta Promedio", format_currency(costos['precio_promedio']))
     with col3:
-        margen_promedio = costos_completos['Margen(S/)'].mean()
-        st.metric("Margen Promedio", format_currency(margen_promedio))
+        st.metric("Margen Promedio", format_currency(costos['margen_promedio']))
     with col4:
-        margen_porc_promedio = costos_completos['Margen_Porcentaje'].mean()
-        st.metric("Margen % Promedio", f"{margen_porc_promedio:.1f}%")
+        st.metric("Margen % Promedio", f"{costos['margen_porc_promedio']:.1f}%")
     
     # Gráficos de costos
     st.subheader("📊 Evolución de Costos y Margenes")
@@ -181,121 +517,77 @@ elif section == "💰 Análisis de Costos":
     col1, col2 = st.columns(2)
     
     with col1:
-        # Costos promedio por mes
-        costos_mensuales = costos_completos.groupby('Mes').agg({
-            'Costo_Total(S/)': 'mean',
-            'Precio_Venta(S/)': 'mean',
-            'Margen(S/)': 'mean'
-        }).reset_index()
-        
-        fig_costos = go.Figure()
-        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Costo_Total(S/)'], 
-                                       name='Costo Total', line=dict(color='red')))
-        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Precio_Venta(S/)'], 
-                                       name='Precio Venta', line=dict(color='green')))
-        fig_costos.add_trace(go.Scatter(x=costos_mensuales['Mes'], y=costos_mensuales['Margen(S/)'], 
-                                       name='Margen', line=dict(color='blue')))
-        fig_costos.update_layout(title=f"Evolución de Costos y Precios - {año}")
-        st.plotly_chart(fig_costos, use_container_width=True)
+        mostrar_grafico(costos['fig_costos'])
     
     with col2:
-        # Margen por categoría
-        margen_categoria = costos_completos.groupby('Categoria')['Margen_Porcentaje'].mean().reset_index()
-        fig_margen_cat = px.bar(margen_categoria, x='Categoria', y='Margen_Porcentaje',
-                               title=f"Margen Promedio por Categoría - {año}")
-        st.plotly_chart(fig_margen_cat, use_container_width=True)
+        mostrar_grafico(costos['fig_margen_cat'])
+    
+    mostrar_grafico(costos['fig_margen_años'])
     
     # Top productos más rentables
     st.subheader("🏆 Productos Más Rentables")
-    rentabilidad_productos = costos_completos.groupby(['ID_Producto', 'Nombre_Producto']).agg({
-        'Margen_Porcentaje': 'mean',
-        'Margen(S/)': 'mean',
-        'Costo_Total(S/)': 'mean'
-    }).reset_index().sort_values('Margen_Porcentaje', ascending=False)
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.write("Top 10 Productos por Margen %")
-        top_10_margen = rentabilidad_productos.head(10)
-        fig_top_margen = px.bar(top_10_margen, x='Nombre_Producto', y='Margen_Porcentaje',
-                               title="Top 10 Productos por Margen %")
-        st.plotly_chart(fig_top_margen, use_container_width=True)
+        mostrar_grafico(costos['fig_top_margen'])
     
     with col2:
         st.write("Top 10 Productos por Margen Absoluto")
-        top_10_absoluto = rentabilidad_productos.nlargest(10, 'Margen(S/)')
-        fig_top_absoluto = px.bar(top_10_absoluto, x='Nombre_Producto', y='Margen(S/)',
-                                 title="Top 10 Productos por Margen Absoluto")
-        st.plotly_chart(fig_top_absoluto, use_container_width=True)
+        mostrar_grafico(costos['fig_top_absoluto'])
+    
+    # Costo estándar calculado con la lista de materiales y los tiempos de proceso
+    st.subheader("🧾 Costo Estándar por Producto")
+    
+    with st.expander("Simular cambio de precio de un insumo"):
+        insumo_cambio = st.selectbox("Insumo:", data['INSUMOS']['Nombre_Insumo'].tolist())
+        fila_insumo = data['INSUMOS'][data['INSUMOS']['Nombre_Insumo'] == insumo_cambio].iloc[0]
+        nuevo_costo_insumo = st.number_input("Nuevo costo unitario (S/):", min_value=0.0,
+                                             value=float(fila_insumo['Costo_Unitario(S/)']))
+    fig_estandar = calculos_costo_estandar(firma, fila_insumo['ID_Insumo'], nuevo_costo_insumo)
+    mostrar_grafico(fig_estandar)
 
 # ===== SECCIÓN 4: ANÁLISIS DE DEMANDA =====
 elif section == "📊 Análisis de Demanda":
     st.header("📊 Análisis de Demanda")
     
+    indices = load_indices(firma)
+    
     # Selector de producto para análisis de demanda
     producto_demanda = st.selectbox("Selecciona producto para análisis:", 
                                    data['PRODUCTOS']['Nombre_Producto'].tolist())
     
     if producto_demanda:
-        producto_id = data['PRODUCTOS'][data['PRODUCTOS']['Nombre_Producto'] == producto_demanda].iloc[0]['ID_Producto']
-        
-        # Combinar datos de demanda de todos los años
-        demanda_total = pd.concat([
-            data['DEMANDA_2021'],
-            data['DEMANDA_2022'],
-            data['DEMANDA_2023'],
-            data['DEMANDA_2024']
-        ])
-        
-        # Filtrar por producto seleccionado
-        demanda_producto = demanda_total[demanda_total['ID_Producto'] == producto_id].copy()
-        
-        # Ordenar por año y mes
-        meses_orden = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 
-                      'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-        demanda_producto['Mes'] = pd.Categorical(demanda_producto['Mes'], categories=meses_orden, ordered=True)
-        
-        # Crear año para el gráfico
-        años = [2021] * 12 + [2022] * 12 + [2023] * 12 + [2024] * 12
-        demanda_producto = demanda_producto.sort_values('Mes')
-        demanda_producto['Año'] = años
+        producto_id = indices['id_por_nombre'][producto_demanda]
+        figuras = calculos_demanda(firma, producto_id)
         
         st.subheader(f"📈 Evolución de la Demanda - {producto_demanda}")
+        mostrar_grafico(figuras['fig_demanda'])
         
-        fig_demanda = go.Figure()
-        fig_demanda.add_trace(go.Scatter(x=demanda_producto['Mes'], y=demanda_producto['Demanda_Minima'], 
-                                        name='Demanda Mínima', line=dict(color='orange')))
-        fig_demanda.add_trace(go.Scatter(x=demanda_producto['Mes'], y=demanda_producto['Demanda_Maxima'], 
-                                        name='Demanda Máxima', line=dict(color='red')))
-        fig_demanda.update_layout(title=f"Demanda Mínima y Máxima por Mes - {producto_demanda}",
-                                 xaxis_title="Mes", yaxis_title="Demanda")
-        st.plotly_chart(fig_demanda, use_container_width=True)
+        # Tendencia: medias móviles y crecimiento interanual
+        st.subheader("📉 Tendencia y Crecimiento")
+        mostrar_grafico(figuras['fig_tendencia'])
         
         # Análisis estacionalidad
         st.subheader("🔄 Análisis de Estacionalidad")
+        mostrar_grafico(figuras['fig_estacionalidad'])
         
-        demanda_promedio = demanda_producto.groupby('Mes').agg({
-            'Demanda_Minima': 'mean',
-            'Demanda_Maxima': 'mean'
-        }).reset_index()
+        # Pronóstico
+        st.subheader("🔮 Pronóstico de Demanda")
         
-        fig_estacionalidad = go.Figure()
-        fig_estacionalidad.add_trace(go.Scatter(x=demanda_promedio['Mes'], y=demanda_promedio['Demanda_Minima'], 
-                                              name='Demanda Mínima Promedio', line=dict(color='lightblue')))
-        fig_estacionalidad.add_trace(go.Scatter(x=demanda_promedio['Mes'], y=demanda_promedio['Demanda_Maxima'], 
-                                              name='Demanda Máxima Promedio', line=dict(color='darkblue')))
-        fig_estacionalidad.update_layout(title="Patrón de Estacionalidad Promedio (2021-2024)")
-        st.plotly_chart(fig_estacionalidad, use_container_width=True)
+        modelo_pronostico = st.radio("Modelo:", pronostico.MODELOS, horizontal=True)
+        mostrar_grafico(calculos_pronostico(firma, producto_id, modelo_pronostico))
 
 # ===== SECCIÓN 5: ANÁLISIS DE PROCESOS =====
 elif section == "⚙️ Análisis de Procesos":
     st.header("⚙️ Análisis de Procesos Productivos")
     
     # Selector de año para capacidad
-    año_capacidad = st.selectbox("Selecciona año para análisis de capacidad:", [2021, 2022, 2023, 2024])
+    año_capacidad = st.selectbox("Selecciona año para análisis de capacidad:", años_datos)
     
-    capacidad_año = data[f'CAPACIDAD_{año_capacidad}']
+    figuras = calculos_procesos(firma, año_capacidad)
+    generales = calculos_procesos_generales(firma)
     
     # Análisis de capacidad
     st.subheader("🏭 Capacidad de Producción por Proceso")
@@ -303,39 +595,41 @@ elif section == "⚙️ Análisis de Procesos":
     col1, col2 = st.columns(2)
     
     with col1:
-        # Capacidad promedio por proceso
-        capacidad_proceso = capacidad_año.groupby('Nombre_Proceso').agg({
-            'Minutos_Disponibles': 'mean',
-            'Operarios_Disponibles': 'mean'
-        }).reset_index()
-        
-        fig_capacidad = px.bar(capacidad_proceso, x='Nombre_Proceso', y='Minutos_Disponibles',
-                              title=f"Capacidad Promedio por Proceso - {año_capacidad}")
-        st.plotly_chart(fig_capacidad, use_container_width=True)
+        mostrar_grafico(figuras['fig_capacidad'])
     
     with col2:
         # Operarios por proceso
-        fig_operarios = px.bar(capacidad_proceso, x='Nombre_Proceso', y='Operarios_Disponibles',
-                              title=f"Operarios por Proceso - {año_capacidad}")
-        st.plotly_chart(fig_operarios, use_container_width=True)
+        mostrar_grafico(figuras['fig_operarios'])
     
     # Análisis de costos de procesos
     st.subheader("💰 Costos de Procesos")
-    
-    procesos = data['PROCESOS']
-    fig_costos_procesos = px.bar(procesos, x='Nombre_Proceso', y='Costo_Minuto(S/)',
-                                title="Costo por Minuto de Cada Proceso")
-    st.plotly_chart(fig_costos_procesos, use_container_width=True)
+    mostrar_grafico(generales['fig_costos_procesos'])
     
     # Tiempos totales por proceso
     st.subheader("⏱️ Tiempos Totales por Proceso")
+    mostrar_grafico(generales['fig_tiempos_totales'])
     
-    tiempos_totales = data['TIEMPO_PROCESOS'].groupby('ID_Proceso')['Tiempo_Minutos'].sum().reset_index()
-    tiempos_totales = tiempos_totales.merge(data['PROCESOS'], on='ID_Proceso')
+    # Carga requerida por la demanda frente a la capacidad disponible
+    st.subheader("🚦 Utilización de Capacidad y Cuellos de Botella")
+    
+    años_proyeccion = datos.años_disponibles(load_proyeccion(firma))
+    col1, col2 = st.columns(2)
+    with col1:
+        año_uso = st.selectbox("Año (los años futuros usan el pronóstico):", años_proyeccion,
+                               index=años_proyeccion.index(año_capacidad))
+    with col2:
+        medida = st.radio("Demanda a cargar:", list(capacidad.MEDIDAS_DEMANDA), horizontal=True)
+    utilizacion = calculos_utilizacion(firma, año_uso, medida)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        mostrar_grafico(utilizacion['fig_utilizacion'])
     
-    fig_tiempos_totales = px.bar(tiempos_totales, x='Nombre_Proceso', y='Tiempo_Minutos',
-                                title="Tiempo Total Requerido por Proceso")
-    st.plotly_chart(fig_tiempos_totales, use_container_width=True)
+    with col2:
+        mostrar_grafico(utilizacion['fig_ranking'])
+    
+    st.dataframe(utilizacion['ranking'])
 
 # ===== SECCIÓN 6: ESCENARIOS Y SIMULACIONES =====
 else:
@@ -346,6 +640,10 @@ else:
     Ajusta los parámetros para simular diferentes escenarios de producción y su impacto en costos y rentabilidad.
     """)
     
+    indices = load_indices(firma)
+    rollup = load_rollup(firma)
+    años_proyeccion = datos.años_disponibles(load_proyeccion(firma))
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -356,12 +654,17 @@ else:
                                    data['PRODUCTOS']['Nombre_Producto'].tolist())
         
         if producto_sim:
-            producto_id = data['PRODUCTOS'][data['PRODUCTOS']['Nombre_Producto'] == producto_sim].iloc[0]['ID_Producto']
-            producto_info = data['PRODUCTOS'][data['PRODUCTOS']['Nombre_Producto'] == producto_sim].iloc[0]
+            producto_id = indices['id_por_nombre'][producto_sim]
+            producto_info = indices['producto'][producto_id]
             
-            # Obtener costos actuales
-            costo_actual = data['COSTOS_2024'][data['COSTOS_2024']['ID_Producto'] == producto_id]['Costo_Total(S/)'].mean()
-            precio_actual = data['DEMANDA_2024'][data['DEMANDA_2024']['ID_Producto'] == producto_id]['Precio_Venta(S/)'].mean()
+            # Obtener costos actuales (último año disponible). Insumos y procesos salen de COSTOS,
+            # igual que en `simulacion.costos_base`, para que este simulador y el barrido coincidan.
+            costos_producto = indices['costos'][producto_id]
+            costos_actuales = costos_producto[costos_producto['Año'] == años_datos[-1]]
+            costo_insumos_actual = costos_actuales['Costo_Insumos(S/)'].mean()
+            costo_procesos_actual = costos_actuales['Costo_Procesos(S/)'].mean()
+            costo_actual = costo_insumos_actual + costo_procesos_actual
+            precio_actual = costos_actuales['Precio_Venta(S/)'].mean()
             
             st.metric("Costo Actual Promedio", format_currency(costo_actual))
             st.metric("Precio Venta Actual", format_currency(precio_actual))
@@ -376,9 +679,12 @@ else:
         st.subheader("📊 Resultados de la Simulación")
         
         if producto_sim:
-            # Cálculos de simulación
-            nuevo_costo_insumos = costo_actual * 0.6 * (1 - reduccion_insumos/100)  # 60% del costo son insumos
-            nuevo_costo_procesos = costo_actual * 0.4 * (1 - eficiencia_procesos/100)  # 40% del costo son procesos
+            # Cálculos de simulación sobre los costos reales de insumos y procesos del producto
+            desglose = costeo.desglose_producto(rollup, producto_id)
+            participacion_insumos = costo_insumos_actual / costo_actual if costo_actual > 0 else 0.0
+            participacion_estandar = costeo.participacion_insumos(rollup, producto_id)
+            nuevo_costo_insumos = costo_insumos_actual * (1 - reduccion_insumos/100)
+            nuevo_costo_procesos = costo_procesos_actual * (1 - eficiencia_procesos/100)
             nuevo_costo_total = nuevo_costo_insumos + nuevo_costo_procesos
             
             nuevo_precio = precio_actual * (1 + aumento_precio/100)
@@ -395,7 +701,7 @@ else:
                 st.metric("Costo Actual", format_currency(costo_actual))
                 st.metric("Costo Simulado", format_currency(nuevo_costo_total), 
                          delta=format_currency(nuevo_costo_total - costo_actual))
-                
+            
             with col_res2:
                 st.metric("Margen Actual", f"{margen_actual_porc:.1f}%")
                 st.metric("Margen Simulado", f"{nuevo_margen_porc:.1f}%", 
@@ -428,7 +734,7 @@ else:
                     'delta' : {'reference': 90}}]
                                      }})
             
-            st.plotly_chart(fig_comparativo, use_container_width=True)
+            mostrar_grafico(fig_comparativo)
             
             # Impacto financiero total
             utilidad_actual = margen_actual * volumen_produccion
@@ -436,6 +742,114 @@ else:
             mejora_utilidad = utilidad_simulada - utilidad_actual
             
             st.success(f"**Impacto en Utilidad Total:** {format_currency(mejora_utilidad)}")
+            
+            st.write(f"Estructura de costo real ({años_datos[-1]}): {participacion_insumos * 100:.1f}% insumos, "
+                     f"{(1 - participacion_insumos) * 100:.1f}% procesos")
+            st.write(f"Estructura de costo estándar (lista de materiales y ruta): "
+                     f"{participacion_estandar * 100:.1f}% insumos, {(1 - participacion_estandar) * 100:.1f}% procesos")
+            st.dataframe(desglose)
+    
+    # Optimización del plan de producción (todos los productos y meses)
+    st.markdown("---")
+    st.subheader("🧮 Plan de Producción Óptimo")
+    st.caption("Maximiza el margen total sujeto a la capacidad mensual de cada proceso (minutos y "
+               "operarios) y a los límites de demanda (programación lineal con HiGHS).")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        año_plan = st.selectbox("Año a planificar:", años_proyeccion, index=len(años_datos) - 1)
+    with col2:
+        cumplir_minimo = st.checkbox("Exigir Demanda Mínima", value=False)
+    with col3:
+        enteros = st.checkbox("Unidades enteras (MIP)", value=False)
+    with col4:
+        minutos_por_operario = st.number_input("Minutos por operario al mes (0 = sin límite):", min_value=0,
+                                               value=optimizacion.MINUTOS_POR_OPERARIO, step=60)
+    
+    plan = plan_optimo(firma, año_plan, enteros, cumplir_minimo, int(minutos_por_operario) or None)
+    
+    if not plan['exito']:
+        st.error(f"No se encontró un plan factible: {plan['mensaje']}")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Margen Total Óptimo", format_currency(plan['margen_total']))
+        with col2:
+            st.metric("Unidades a Producir", f"{plan['unidades_totales']:,.0f}")
+        
+        mostrar_grafico(plan['fig_uso'])
+        st.dataframe(plan['plan_productos'])
+    
+    # Barrido de escenarios para todos los productos a la vez
+    st.markdown("---")
+    st.subheader("🗺️ Barrido de Escenarios")
+    st.caption("Evalúa la grilla completa de parámetros para todos los productos en una sola operación vectorizada.")
+    
+    # La misma grilla que la corrida por lotes del motor, que así cubre el barrido por defecto
+    rangos = tuple(motor.RANGOS_BARRIDO.items())
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        eje_x = st.selectbox("Eje X:", simulacion.PARAMETROS, index=2,
+                             format_func=simulacion.ETIQUETAS.get)
+    with col2:
+        eje_y = st.selectbox("Eje Y:", [p for p in simulacion.PARAMETROS if p != eje_x],
+                             format_func=simulacion.ETIQUETAS.get)
+    with col3:
+        pasos = st.slider("Puntos por parámetro:", 5, 41, motor.PARAMETROS['pasos_barrido'])
+    
+    # Los parámetros que no están en los ejes toman el valor fijado en los sliders
+    valores_base = (
+        ('reduccion_insumos', reduccion_insumos),
+        ('eficiencia_procesos', eficiencia_procesos),
+        ('aumento_precio', aumento_precio),
+        ('volumen', volumen_produccion),
+    )
+    
+    año_base = años_datos[-1]
+    figuras = figuras_barrido(firma, año_base, rangos, pasos, eje_x, eje_y, valores_base)
+    st.write(f"Escenarios evaluados: {figuras['escenarios']:,} (base {año_base})")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        mostrar_grafico(figuras['fig_superficie'])
+    
+    with col2:
+        mostrar_grafico(figuras['fig_tornado'])
+    
+    # Simulación de riesgo
+    st.markdown("---")
+    st.subheader("🎲 Simulación de Riesgo (Monte Carlo)")
+    st.caption("Muestrea demanda entre Demanda_Minima y Demanda_Maxima y costos con la variación "
+               "histórica interanual; evalúa utilidad y uso de capacidad de todos los productos y meses.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        año_riesgo = st.selectbox("Año de referencia:", años_datos, index=len(años_datos) - 1)
+    with col2:
+        ensayos = st.select_slider("Número de ensayos:", [1_000, 10_000, 50_000, 100_000], value=10_000)
+    with col3:
+        semilla = st.number_input("Semilla:", min_value=0, value=0, step=1)
+    
+    mc = riesgo(firma, año_riesgo, ensayos, int(semilla))
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Utilidad P5", format_currency(mc['percentiles_utilidad'][5]))
+    with col2:
+        st.metric("Utilidad P50", format_currency(mc['percentiles_utilidad'][50]))
+    with col3:
+        prob_exceso = mc['prob_exceso_capacidad']
+        st.metric("Prob. de Exceder Capacidad", "sin datos" if np.isnan(prob_exceso) else f"{prob_exceso * 100:.1f}%")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        mostrar_grafico(mc['fig_hist'])
+    
+    with col2:
+        mostrar_grafico(mc['fig_exceso'])
 
 # Footer
 st.markdown("---")
@@ -444,19 +858,49 @@ st.write(f"""
 - **Productos:** {len(data['PRODUCTOS'])} productos en {data['PRODUCTOS']['Categoria'].nunique()} categorías
 - **Insumos:** {len(data['INSUMOS'])} tipos de insumos
 - **Procesos:** {len(data['PROCESOS'])} procesos productivos
-- **Período:** Datos históricos desde 2021 hasta 2024
+- **Período:** Datos históricos desde {años_datos[0]} hasta {años_datos[-1]}
 - **Cobertura:** Análisis mensual de demanda, costos y capacidad
 """)
 
 # Información adicional en el sidebar
 st.sidebar.markdown("---")
-st.sidebar.info("""
+st.sidebar.info(f"""
 **📁 Datos Cargados:**
-- 20 Productos textiles
-- 15 Insumos diferentes  
-- 5 Procesos productivos
-- 4 años de datos históricos
+- {len(data['PRODUCTOS'])} Productos textiles
+- {len(data['INSUMOS'])} Insumos diferentes  
+- {len(data['PROCESOS'])} Procesos productivos
+- {len(años_datos)} años de datos históricos
 - Análisis mensual completo
 """)
+if firma[1]:
+    st.sidebar.caption(f"Ingesta incremental: versión {firma[1]} (años {', '.join(map(str, años_datos))})")
+
+estadisticas = cache_calculos.cache.estadisticas()
+aciertos = sum(s['aciertos'] for s in estadisticas['secciones'].values())
+fallos = sum(s['fallos'] for s in estadisticas['secciones'].values())
+st.sidebar.caption(f"Caché de cálculos: {estadisticas['entradas']}/{estadisticas['max_entradas']} entradas, "
+                   f"{estadisticas['bytes'] / 2**20:.1f}/{estadisticas['max_bytes'] / 2**20:.0f} MB, "
+                   f"{aciertos} aciertos, {fallos} fallos")
+reportes = load_reportes(firma, motor.version_reportes())
+if reportes.generado:
+    st.sidebar.caption(f"Reportes del motor: corrida del {reportes.generado} ({len(reportes)} reportes)")
+else:
+    st.sidebar.caption("Reportes del motor: sin corrida para estos datos (se calcula en línea)")
+
+# Panel de depuración: spans del rerun, contadores de caché y exportación en JSON
+if st.sidebar.checkbox("🛠️ Panel de depuración", value=False):
+    with st.sidebar.expander("Tiempos del rerun", expanded=True):
+        tabla_spans = pd.DataFrame(telemetria.spans())
+        if not tabla_spans.empty:
+            tabla_spans['nombre'] = ['  ' * p + n for p, n in zip(tabla_spans['profundidad'], tabla_spans['nombre'])]
+            st.dataframe(tabla_spans.drop(columns=['padre', 'profundidad']), hide_index=True)
+        st.write("Contadores:", telemetria.contadores())
+        st.write("Acumulado del proceso:")
+        st.dataframe(pd.DataFrame.from_dict(telemetria.acumulados(), orient='index').sort_values('total_ms', ascending=False))
+        st.download_button("⬇️ Exportar JSON", telemetria.exportar_json(seccion=section, cache=estadisticas),
+                           file_name="telemetria.json", mime="application/json")
+
+# Una línea JSON por rerun en stderr (logger `telemetria`, nivel TELEMETRIA_NIVEL) y en TELEMETRIA_ARCHIVO si está definido
+telemetria.registrar(seccion=section, cache=estadisticas)
 
 
@@ -0,0 +1,280 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+import optimizacion
+
+# Orden de los ejes en los arreglos de resultados
+PARAMETROS = ['reduccion_insumos', 'eficiencia_procesos', 'aumento_precio', 'volumen']
+
+ETIQUETAS = {
+    'reduccion_insumos': 'Reducción Insumos (%)',
+    'eficiencia_procesos': 'Eficiencia Procesos (%)',
+    'aumento_precio': 'Aumento Precio (%)',
+    'volumen': 'Volumen (unidades)',
+}
+
+
+def costos_base(modelo, año):
+    """Costo de insumos, costo de procesos y precio promedio de cada producto en un año."""
+    costos = modelo['COSTOS'][modelo['COSTOS']['Año'] == año]
+    base = costos.groupby('ID_Producto', observed=True).agg({
+        'Costo_Insumos(S/)': 'mean',
+        'Costo_Procesos(S/)': 'mean',
+        'Precio_Venta(S/)': 'mean'
+    })
+    base = base.reindex(modelo['PRODUCTOS']['ID_Producto'])
+    base['Nombre_Producto'] = modelo['PRODUCTOS']['Nombre_Producto'].to_numpy()
+    return base.reset_index()
+
+
+# Elementos (escenario x producto) que se materializan a la vez al reducir sobre los productos
+ELEMENTOS_POR_BLOQUE = 2_000_000
+
+
+def barrido_escenarios(base, reduccion_insumos, eficiencia_procesos, aumento_precio, volumen, mejora=False):
+    """Evalúa la grilla completa de escenarios para todos los productos y suma sobre ellos.
+
+    Cada parámetro es un escalar o un arreglo de valores (porcentajes o
+    unidades). El margen de cada producto sólo depende de (reducción,
+    eficiencia, aumento), así que se calcula por broadcasting para un bloque
+    de productos a la vez y se acumula su suma; el volumen se aplica al
+    final. La memoria depende del tamaño de la grilla, no del número de
+    productos. Los resultados tienen forma (n_reduccion, n_eficiencia,
+    n_aumento, n_volumen), con 1 en los ejes de los que no dependen:
+    `margen` y `utilidad` son totales de todos los productos y
+    `margen_porcentaje` es su promedio. `mejora_utilidad` (frente a los
+    valores actuales) sólo se calcula si se pide.
+    """
+    ejes = {
+        'reduccion_insumos': np.atleast_1d(np.asarray(reduccion_insumos, dtype=float)),
+        'eficiencia_procesos': np.atleast_1d(np.asarray(eficiencia_procesos, dtype=float)),
+        'aumento_precio': np.atleast_1d(np.asarray(aumento_precio, dtype=float)),
+        'volumen': np.atleast_1d(np.asarray(volumen, dtype=float)),
+    }
+    r = ejes['reduccion_insumos'][:, None, None, None]
+    e = ejes['eficiencia_procesos'][None, :, None, None]
+    a = ejes['aumento_precio'][None, None, :, None]
+    v = ejes['volumen'][None, None, None, :]
+
+    insumos = base['Costo_Insumos(S/)'].to_numpy(dtype=float)
+    procesos = base['Costo_Procesos(S/)'].to_numpy(dtype=float)
+    precio = base['Precio_Venta(S/)'].to_numpy(dtype=float)
+
+    forma = (len(ejes['reduccion_insumos']), len(ejes['eficiencia_procesos']), len(ejes['aumento_precio']))
+    margen = np.zeros(forma)
+    suma_porcentaje = np.zeros(forma)
+    bloque = max(1, ELEMENTOS_POR_BLOQUE // int(np.prod(forma)))
+    for inicio in range(0, len(precio), bloque):
+        p = slice(inicio, inicio + bloque)
+        costo = insumos[p] * (1 - r / 100) + procesos[p] * (1 - e / 100)     # (R, E, 1, b)
+        nuevo_precio = precio[p] * (1 + a / 100)                             # (1, 1, A, b)
+        margen_bloque = nuevo_precio - costo                                 # (R, E, A, b)
+        margen += margen_bloque.sum(axis=-1)
+        suma_porcentaje += (margen_bloque / nuevo_precio * 100).sum(axis=-1)
+
+    margen = margen[..., None]                                               # (R, E, A, 1)
+    resultado = {
+        'ejes': ejes,
+        'productos': base['ID_Producto'].tolist(),
+        'escenarios': int(np.prod(forma)) * len(ejes['volumen']) * len(precio),
+        'margen': margen,
+        'margen_porcentaje': suma_porcentaje[..., None] / max(len(precio), 1),
+        'utilidad': margen * v,                                              # (R, E, A, V)
+    }
+    if mejora:
+        resultado['mejora_utilidad'] = (margen - (precio - insumos - procesos).sum()) * v
+    return resultado
+
+
+def _expandir(resultado, medida):
+    """Lleva una medida a la forma completa (R, E, A, V) sin copiar datos."""
+    forma = tuple(len(resultado['ejes'][p]) for p in PARAMETROS)
+    return np.broadcast_to(resultado[medida], forma)
+
+
+def superficie(resultado, eje_x, eje_y, medida='utilidad', fijos=None):
+    """Tabla 2D (eje_y x eje_x) de una medida para un mapa de calor.
+
+    Los demás parámetros se fijan en el valor de la grilla más cercano a
+    `fijos[parametro]` (por defecto el primero). Para la superficie de un
+    solo producto, se barre una `base` con sólo ese producto.
+    """
+    fijos = fijos or {}
+    valores = _expandir(resultado, medida)
+
+    seleccion = []
+    for parametro in PARAMETROS:
+        if parametro in (eje_x, eje_y):
+            seleccion.append(slice(None))
+        else:
+            grilla = resultado['ejes'][parametro]
+            objetivo = fijos.get(parametro, grilla[0])
+            seleccion.append(int(np.abs(grilla - objetivo).argmin()))
+    valores = valores[tuple(seleccion)]
+
+    if PARAMETROS.index(eje_x) < PARAMETROS.index(eje_y):
+        valores = valores.T
+
+    return pd.DataFrame(valores, index=resultado['ejes'][eje_y], columns=resultado['ejes'][eje_x])
+
+
+def tornado(base, valores_base, rangos, medida='utilidad'):
+    """Sensibilidad de la medida total ante cada parámetro (gráfico tornado).
+
+    `valores_base` fija cada parámetro; `rangos` da {parametro: (bajo, alto)}.
+    Devuelve una fila por parámetro con la medida en el extremo bajo, en el
+    alto y su amplitud, ordenada de mayor a menor impacto.
+    """
+    filas = []
+    for parametro, (bajo, alto) in rangos.items():
+        parametros = dict(valores_base)
+        parametros[parametro] = [bajo, alto]
+        resultado = barrido_escenarios(base, **parametros, mejora=medida == 'mejora_utilidad')
+        total = _expandir(resultado, medida).ravel()
+        filas.append({'Parametro': ETIQUETAS[parametro], 'Bajo': total[0], 'Alto': total[1]})
+
+    sensibilidad = pd.DataFrame(filas)
+    sensibilidad['Amplitud'] = (sensibilidad['Alto'] - sensibilidad['Bajo']).abs()
+    return sensibilidad.sort_values('Amplitud', ascending=False, ignore_index=True)
+
+
+# ===== SIMULACIÓN DE MONTE CARLO (riesgo de demanda y costos) =====
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Por debajo de este trabajo (ensayos x celdas producto-mes) el arranque y la
+# comunicación con el pool cuestan más que simular todo en el proceso actual
+ELEMENTOS_MINIMOS_POOL = 10_000_000
+
+# Pools de procesos del módulo, uno por número de workers; viven lo que vive el proceso.
+# Se crean con 'forkserver' (o 'spawn'): hacer fork de un servidor con hilos, como
+# Streamlit, puede dejar locks tomados en el hijo.
+_pools = {}
+_lock_pools = threading.Lock()
+
+
+def _pool(workers):
+    with _lock_pools:
+        if workers not in _pools:
+            metodo = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context(metodo))
+        return _pools[workers]
+
+
+def _volatilidad_historica(hecho, columna):
+    """Desviación estándar por producto de la variación logarítmica interanual."""
+    serie = hecho.pivot_table(index=['ID_Producto', 'Mes'], columns='Año', values=columna, observed=True)
+    variacion = np.log(serie).diff(axis=1).iloc[:, 1:]
+    return variacion.stack().groupby(level='ID_Producto').std()
+
+
+def parametros_riesgo(modelo, año):
+    """Arreglos de entrada del Monte Carlo para un año (producto x mes y proceso x mes)."""
+    m = optimizacion.matrices_año(modelo, año)
+    demanda = modelo['DEMANDA'].assign(
+        Demanda_Media=(modelo['DEMANDA']['Demanda_Minima'] + modelo['DEMANDA']['Demanda_Maxima']) / 2
+    )
+    sigma_demanda = _volatilidad_historica(demanda, 'Demanda_Media').reindex(m['productos']).fillna(0)
+    sigma_costo = _volatilidad_historica(modelo['COSTOS'], 'Costo_Total(S/)').reindex(m['productos']).fillna(0)
+
+    return {
+        'productos': m['productos'],
+        'procesos': m['procesos'],
+        'meses': m['meses'],
+        'demanda_min': m['demanda_min'],
+        'demanda_max': m['demanda_max'],
+        'precio': np.nan_to_num(m['precio']),
+        'costo': np.nan_to_num(m['costo']),
+        'sigma_demanda': sigma_demanda.to_numpy()[:, None],
+        'sigma_costo': sigma_costo.to_numpy()[:, None],
+        'tiempos': m['tiempos'],
+        'minutos': m['minutos'],
+    }
+
+
+def _simular_lote(parametros, n, semilla):
+    """Simula `n` ensayos vectorizados (ensayo x producto x mes) con una semilla propia."""
+    rng = np.random.default_rng(semilla)
+    forma = (n,) + parametros['demanda_min'].shape
+
+    # Demanda uniforme entre mínimo y máximo, con choque lognormal de la volatilidad histórica
+    demanda = rng.uniform(parametros['demanda_min'], parametros['demanda_max'], size=forma)
+    demanda *= np.exp(rng.standard_normal(forma) * parametros['sigma_demanda']
+                      - parametros['sigma_demanda'] ** 2 / 2)
+    costo = parametros['costo'] * np.exp(rng.standard_normal(forma) * parametros['sigma_costo']
+                                         - parametros['sigma_costo'] ** 2 / 2)
+
+    utilidad = ((parametros['precio'] - costo) * demanda).sum(axis=(1, 2))
+
+    carga = np.matmul(parametros['tiempos'].T, demanda)          # (n, proceso, mes)
+    # Capacidad sin registrar: utilización desconocida (NaN), no carga cero
+    conocida = ~np.isnan(parametros['minutos'])
+    utilizacion = np.divide(carga, parametros['minutos'], out=np.where(conocida, np.zeros_like(carga), np.nan),
+                            where=np.nan_to_num(parametros['minutos']) > 0)
+
+    return {
+        'utilidad': utilidad,
+        'utilizacion_maxima': np.fmax.reduce(utilizacion.reshape(n, -1), axis=1),
+        'excesos': (utilizacion > 1).sum(axis=0),
+        'suma_utilizacion': utilizacion.sum(axis=0),
+    }
+
+
+def monte_carlo(parametros, ensayos=100_000, semilla=0, workers=None, tamano_lote=None):
+    """Simulación de riesgo de utilidad y capacidad repartida en un pool de procesos.
+
+    Los ensayos se dividen en lotes; cada lote recibe una semilla hija de
+    `SeedSequence(semilla)`, por lo que el resultado no depende de
+    `workers`. Con `workers=1`, o si el trabajo es menor que
+    ELEMENTOS_MINIMOS_POOL, todo corre en el proceso actual; si no, los
+    lotes van a un pool persistente del módulo.
+    """
+    celdas = parametros['demanda_min'].size
+    if tamano_lote is None:
+        tamano_lote = max(1, min(ensayos, 2_000_000 // max(celdas, 1)))
+    tamanos = [tamano_lote] * (ensayos // tamano_lote)
+    if ensayos % tamano_lote:
+        tamanos.append(ensayos % tamano_lote)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tamanos) == 1 or ensayos * celdas < ELEMENTOS_MINIMOS_POOL:
+        lotes = [_simular_lote(parametros, n, s) for n, s in zip(tamanos, semillas)]
+    else:
+        try:
+            lotes = list(_pool(workers).map(_simular_lote, [parametros] * len(tamanos), tamanos, semillas))
+        except BrokenProcessPool:
+            # Un worker murió: se descarta el pool para que la próxima llamada cree otro
+            with _lock_pools:
+                _pools.pop(workers, None)
+            raise
+
+    utilidad = np.concatenate([lote['utilidad'] for lote in lotes])
+    utilizacion_maxima = np.concatenate([lote['utilizacion_maxima'] for lote in lotes])
+    excesos = sum(lote['excesos'] for lote in lotes)
+    suma_utilizacion = sum(lote['suma_utilizacion'] for lote in lotes)
+
+    n_proc, n_mes = len(parametros['procesos']), len(parametros['meses'])
+    conocida = ~np.isnan(parametros['minutos'])
+    capacidad = pd.DataFrame({
+        'ID_Proceso': np.repeat(parametros['procesos'], n_mes),
+        'Mes': np.tile(parametros['meses'], n_proc),
+        'Utilizacion_Media': (suma_utilizacion / ensayos).ravel(),
+        'Prob_Exceso': np.where(conocida, excesos / ensayos, np.nan).ravel(),
+    })
+
+    return {
+        'ensayos': ensayos,
+        'utilidad': utilidad,
+        'percentiles_utilidad': dict(zip(PERCENTILES, np.percentile(utilidad, PERCENTILES))),
+        'percentiles_utilizacion': dict(zip(PERCENTILES, np.percentile(utilizacion_maxima, PERCENTILES))),
+        'prob_exceso_capacidad': float((utilizacion_maxima > 1).mean()) if conocida.any() else np.nan,
+        'capacidad': capacidad,
+    }
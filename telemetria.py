@@ -0,0 +1,126 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Si está definida, cada rerun se agrega como una línea JSON a este archivo
+ARCHIVO_LOG = os.environ.get('TELEMETRIA_ARCHIVO')
+# Nivel del logger `telemetria` (los reportes salen en INFO); WARNING los silencia en consola
+NIVEL_LOG = os.environ.get('TELEMETRIA_NIVEL', 'INFO')
+
+# Handler propio hacia stderr: sin él (y sin configurar el logging raíz) las líneas INFO se pierden.
+# No se propaga para no duplicarlas si la aplicación configura el logger raíz.
+logger = logging.getLogger('telemetria')
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(asctime)s telemetria %(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(NIVEL_LOG)
+    logger.propagate = False
+
+# Estado del rerun en curso; cada sesión de Streamlit corre su script en su propio hilo
+_local = threading.local()
+
+# Acumulados por nombre de span desde que arrancó el proceso (todas las sesiones)
+_acumulados = {}
+_lock = threading.Lock()
+
+
+def _estado():
+    if not hasattr(_local, 'spans'):
+        _local.spans, _local.pila, _local.contadores = [], [], {}
+        _local.inicio, _local.atributos = time.perf_counter(), {}
+    return _local
+
+
+def iniciar_rerun(**atributos):
+    """Descarta los spans del rerun anterior de este hilo y empieza a medir uno nuevo."""
+    _local.spans, _local.pila, _local.contadores = [], [], {}
+    _local.inicio, _local.atributos = time.perf_counter(), atributos
+
+
+@contextmanager
+def span(nombre, **atributos):
+    """Mide un bloque; los spans anidados quedan con su profundidad y su padre."""
+    estado = _estado()
+    registro = {
+        'nombre': nombre,
+        'padre': estado.pila[-1]['nombre'] if estado.pila else None,
+        'profundidad': len(estado.pila),
+        'inicio_ms': (time.perf_counter() - estado.inicio) * 1000,
+        **atributos,
+    }
+    estado.spans.append(registro)
+    estado.pila.append(registro)
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['duracion_ms'] = (time.perf_counter() - inicio) * 1000
+        estado.pila.pop()
+        with _lock:
+            total = _acumulados.setdefault(nombre, {'llamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            total['llamadas'] += 1
+            total['total_ms'] += registro['duracion_ms']
+            total['max_ms'] = max(total['max_ms'], registro['duracion_ms'])
+
+
+def medido(nombre=None):
+    """Decorador: cada llamada a la función es un span (por defecto con su nombre)."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with span(nombre or funcion.__qualname__):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def contar(nombre, cantidad=1):
+    """Suma a un contador del rerun en curso (por ejemplo, aciertos de caché)."""
+    contadores = _estado().contadores
+    contadores[nombre] = contadores.get(nombre, 0) + cantidad
+
+
+def spans():
+    """Spans del rerun en curso, en orden de inicio."""
+    return list(_estado().spans)
+
+
+def contadores():
+    return dict(_estado().contadores)
+
+
+def acumulados():
+    """{span: llamadas, total_ms, max_ms} de todo el proceso."""
+    with _lock:
+        return {nombre: dict(valores) for nombre, valores in _acumulados.items()}
+
+
+def reporte(**extra):
+    """Resumen estructurado del rerun en curso (serializable a JSON)."""
+    estado = _estado()
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'duracion_ms': (time.perf_counter() - estado.inicio) * 1000,
+        **estado.atributos,
+        'spans': spans(),
+        'contadores': contadores(),
+        **extra,
+    }
+
+
+def exportar_json(**extra):
+    return json.dumps(reporte(**extra), ensure_ascii=False, default=str, indent=2)
+
+
+def registrar(**extra):
+    """Emite el reporte del rerun como una línea JSON por stderr (logger `telemetria`) y en ARCHIVO_LOG."""
+    linea = json.dumps(reporte(**extra), ensure_ascii=False, default=str)
+    logger.info(linea)
+    if ARCHIVO_LOG:
+        with _lock, open(ARCHIVO_LOG, 'a', encoding='utf-8') as f:
+            f.write(linea + '\n')
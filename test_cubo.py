@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+import cubo
+import datos
+
+
+def _modelo():
+    productos = pd.DataFrame({'ID_Producto': ['P001', 'P002'], 'Nombre_Producto': ['Polo', 'Body'],
+                              'Categoria': ['Adulto', 'Bebé'], 'Linea': ['Básica', 'Básica']})
+    costos = pd.DataFrame({
+        'Año': [2025] * 4,
+        'Mes': pd.Categorical(['Enero', 'Enero', 'Febrero', 'Febrero'], dtype=datos.TIPO_MES),
+        'ID_Producto': ['P001', 'P002', 'P001', 'P002'],
+        'Costo_Insumos(S/)': [10.0, 8.0, 11.0, 9.0],
+        'Costo_Procesos(S/)': [5.0, 4.0, 5.0, 4.0],
+        # Febrero de P002 tiene costo pero no demanda: sin precio ni margen
+        'Precio_Venta(S/)': [30.0, 24.0, 32.0, np.nan],
+    }).merge(productos, on='ID_Producto')
+    costos['Costo_Total(S/)'] = costos['Costo_Insumos(S/)'] + costos['Costo_Procesos(S/)']
+    costos['Margen(S/)'] = costos['Precio_Venta(S/)'] - costos['Costo_Total(S/)']
+    costos['Margen_Porcentaje'] = costos['Margen(S/)'] / costos['Precio_Venta(S/)'] * 100
+    return {'COSTOS': costos, 'PRODUCTOS': productos}
+
+
+def test_consultar_promedia_como_mean_con_precio_faltante():
+    modelo = _modelo()
+    resultado = cubo.consultar(cubo.construir_cubo(modelo), ['Año', 'Mes']).set_index(['Año', 'Mes'])
+    esperado = modelo['COSTOS'].groupby(['Año', 'Mes'], observed=True)[cubo.MEDIDAS].mean()
+    pd.testing.assert_frame_equal(resultado[cubo.MEDIDAS], esperado)
+
+
+def test_medida_sin_valores_queda_en_nan():
+    modelo = _modelo()
+    resultado = cubo.consultar(cubo.construir_cubo(modelo), ['ID_Producto', 'Mes'],
+                               filtros={'ID_Producto': 'P002', 'Mes': 'Febrero'})
+    assert np.isnan(resultado.loc[0, 'Margen_Porcentaje'])
+    assert resultado.loc[0, 'Costo_Total(S/)'] == 13.0
@@ -0,0 +1,58 @@
+import pandas as pd
+
+import ingesta
+
+
+def _extracto(ruta, filas):
+    pd.DataFrame(filas, columns=['Año', 'Mes', 'ID_Producto', 'Demanda_Minima', 'Demanda_Maxima',
+                                 'Precio_Venta(S/)']).to_csv(ruta, index=False)
+
+
+def _hoja(directorio, año=2025):
+    archivos = ingesta.periodos_ingeridos('DEMANDA', directorio)[año]
+    return ingesta.hoja_ingerida('DEMANDA', archivos).set_index(['Mes', 'ID_Producto'])
+
+
+def test_reingesta_de_un_extracto_que_crecio_no_duplica_periodos(tmp_path):
+    directorio = str(tmp_path / 'ingesta')
+    ruta = str(tmp_path / 'demanda.csv')
+    _extracto(ruta, [(2025, 1, 'P001', 10, 20, 50.0)])
+    ingesta.ingerir(ruta, 'DEMANDA', directorio=directorio)
+
+    _extracto(ruta, [(2025, 1, 'P001', 10, 20, 50.0), (2025, 2, 'P001', 12, 24, 52.0)])
+    resultado = ingesta.ingerir(ruta, 'DEMANDA', directorio=directorio)
+
+    assert resultado['reemplazado']
+    hoja = _hoja(directorio)
+    assert hoja.loc[('Enero', 'P001'), 'Demanda_Maxima'] == 20
+    assert hoja.loc[('Febrero', 'P001'), 'Demanda_Maxima'] == 24
+
+
+def test_reingesta_retira_los_periodos_que_el_extracto_ya_no_trae(tmp_path):
+    directorio = str(tmp_path / 'ingesta')
+    ruta = str(tmp_path / 'demanda.csv')
+    _extracto(ruta, [(2025, 1, 'P001', 10, 20, 50.0), (2025, 2, 'P001', 12, 24, 52.0)])
+    ingesta.ingerir(ruta, 'DEMANDA', directorio=directorio)
+
+    _extracto(ruta, [(2025, 1, 'P001', 11, 21, 50.0)])
+    ingesta.ingerir(ruta, 'DEMANDA', directorio=directorio)
+
+    hoja = _hoja(directorio)
+    assert list(hoja.index) == [('Enero', 'P001')]
+    assert hoja.loc[('Enero', 'P001'), 'Demanda_Maxima'] == 21
+
+
+def test_archivo_sin_cambios_se_omite_y_archivos_distintos_se_suman(tmp_path):
+    directorio = str(tmp_path / 'ingesta')
+    norte, sur = str(tmp_path / 'norte.csv'), str(tmp_path / 'sur.csv')
+    _extracto(norte, [(2025, 1, 'P001', 10, 20, 50.0)])
+    _extracto(sur, [(2025, 1, 'P001', 5, 8, 54.0)])
+
+    ingesta.ingerir(norte, 'DEMANDA', directorio=directorio)
+    assert ingesta.ingerir(norte, 'DEMANDA', directorio=directorio)['omitido']
+    ingesta.ingerir(sur, 'DEMANDA', directorio=directorio)
+
+    fila = _hoja(directorio).loc[('Enero', 'P001')]
+    assert fila['Demanda_Maxima'] == 28
+    assert fila['Precio_Venta(S/)'] == 52.0
+    assert ingesta.version(directorio) == 2
@@ -0,0 +1,48 @@
+import pandas as pd
+
+import datos
+import pronostico
+
+
+def _hecho(filas, columnas):
+    df = pd.DataFrame(filas, columns=['Año', 'Mes'] + columnas)
+    df['Mes'] = df['Mes'].astype(datos.TIPO_MES)
+    df['Periodo'] = datos.periodos(df['Año'], df['Mes'])
+    return df
+
+
+def _modelo():
+    """2024 completo y sólo enero de 2025 (como tras una ingesta mensual)."""
+    meses = [(2024, mes) for mes in datos.MESES] + [(2025, 'Enero')]
+    return {
+        'DEMANDA': _hecho([(a, m, 'P001', 10, 20, 50.0) for a, m in meses],
+                          ['ID_Producto', 'Demanda_Minima', 'Demanda_Maxima', 'Precio_Venta(S/)']),
+        'COSTOS': _hecho([(a, m, 'P001', 30.0 if a == 2025 else 20.0 + i) for i, (a, m) in enumerate(meses)],
+                         ['ID_Producto', 'Costo_Total(S/)']),
+        'CAPACIDAD': _hecho([(a, m, 'PR01', 1000.0) for a, m in meses], ['ID_Proceso', 'Minutos_Disponibles']),
+    }
+
+
+def _pronostico(meses):
+    filas = [('Holt-Winters', serie, 2025, mes, 'P001', valor)
+             for mes in meses for serie, valor in [('Demanda_Minima', 11.0), ('Demanda_Maxima', 22.0)]]
+    tabla = pd.DataFrame(filas, columns=['Modelo', 'Serie', 'Año', 'Mes', 'ID_Producto', 'Pronostico'])
+    tabla['Mes'] = tabla['Mes'].astype(datos.TIPO_MES)
+    return tabla
+
+
+def test_proyeccion_completa_un_año_en_curso_sin_duplicar_meses():
+    modelo = _modelo()
+    proyeccion = pronostico.modelo_proyectado(modelo, _pronostico(datos.MESES[1:]))
+
+    for hecho, clave in [('DEMANDA', 'ID_Producto'), ('COSTOS', 'ID_Producto'), ('CAPACIDAD', 'ID_Proceso')]:
+        año = proyeccion[hecho][proyeccion[hecho]['Año'] == 2025]
+        assert not año.duplicated(['Mes', clave]).any()
+        assert año['Mes'].nunique() == 12
+
+    costos = proyeccion['COSTOS'][proyeccion['COSTOS']['Año'] == 2025].set_index('Mes')['Costo_Total(S/)']
+    assert costos['Enero'] == 30.0
+    assert costos['Febrero'] == 21.0
+    demanda = proyeccion['DEMANDA'][proyeccion['DEMANDA']['Año'] == 2025].set_index('Mes')
+    assert demanda.loc['Enero', 'Demanda_Maxima'] == 20
+    assert demanda.loc['Febrero', 'Demanda_Maxima'] == 22